@@ -1,11 +1,14 @@
 
+import os
 import time
-import json
 import requests
-import pandas as pd
-import numpy as np
+from http_client import get_client
+from execution import Executor
+# pandas / NumPy (and tickstore, which needs NumPy) are imported by the history
+# functions only, so the live trading path starts without them
 
-URL = "http://fx-trading-game-ensimag-challenge.westeurope.azurecontainer.io:443/"
+# FX_URL points every client at another server, e.g. mock_server.py
+URL = os.environ.get("FX_URL", "http://fx-trading-game-ensimag-challenge.westeurope.azurecontainer.io:443/")
 TRADER_ID = "5TgmRIPU06CO5cUrHoDAPvwuqJjLONM5"
 
 
@@ -14,73 +17,91 @@ class Side:
     SELL = "sell"
 
 class API_MS:
-    def __init__(self,show_log=False):
+    def __init__(self,show_log=False, client=None, url=None, pair="EURGBP"):
         self.trader_id = TRADER_ID
-        self.url = URL
+        self.pair = pair
+        self.base, self.quote = pair[:3], pair[3:]  # position keys, e.g. EUR / GBP
+        self.url = url if url is not None else URL
         self.show_log = show_log
+        self.client = client if client is not None else get_client(self.url)
 
     def get_price(self):
-        api_url = self.url + "/price/EURGBP"
+        # retries with backoff happen in the client; None once they are exhausted
         try:
-            res = requests.get(api_url, timeout=5)
+            res = self.client.get(f"/price/{self.pair}")
             res.raise_for_status()
-            if res.status_code == 200:
-                return json.loads(res.content.decode('utf-8'))
-        except requests.exceptions.ConnectTimeout:
-            if self.show_log:
-                print("Connection timed out while fetching price.")
-                time.sleep(4)  # wait a bit before retrying
-                self.get_price()
-        except Exception as e:
+            return res.json()
+        except requests.exceptions.RequestException as e:
             if self.show_log:
                 print(f"Error fetching price: {e}")
-                time.sleep(4)  # wait a bit before retrying
-                self.get_price()
-    
+            return None
 
     def trade(self, qty, side):
-        api_url = self.url + "/trade/EURGBP"
         data = {"trader_id": self.trader_id, "quantity": qty, "side": side}
         if self.show_log:
             print(f"Trading {data}")
-        res = requests.post(api_url, json=data)
+        try:
+            res = self.client.post(f"/trade/{self.pair}", json=data)
+        except requests.exceptions.RequestException as e:
+            if self.show_log:
+                print(f"Error trading: {e}")
+            return None
         if res.status_code == 200:
-            resp_json = json.loads(res.content.decode('utf-8'))
+            resp_json = res.json()
             if resp_json["success"]:
                 return resp_json
         return None
 
     def history(self):
-        api_url = self.url + "/priceHistory/EURGBP"
-        res = requests.get(api_url)
+        import pandas as pd
+        res = self.client.get(f"/priceHistory/{self.pair}")
         res.raise_for_status()
         if res.status_code == 200:
-            return pd.DataFrame(data=json.loads(res.content.decode('utf-8')).items(),
+            return pd.DataFrame(data=res.json().items(),
                                 columns=["time", "price"])
         return None
 
+    def history_arrays(self):
+        # (times, prices) as float arrays, times in epoch seconds, sorted
+        import numpy as np
+        res = self.client.get(f"/priceHistory/{self.pair}")
+        res.raise_for_status()
+        data = res.json()
+        times = np.fromiter((float(t) for t in data.keys()), dtype=float, count=len(data))
+        prices = np.fromiter((float(p) for p in data.values()), dtype=float, count=len(data))
+        order = np.argsort(times, kind="stable")
+        return times[order], prices[order]
+
     def get_positions(self):
-        api_url = self.url + f"/positions/{self.trader_id}"
-        res = requests.get(api_url)
+        res = self.client.get(f"/positions/{self.trader_id}")
         res.raise_for_status()
         if res.status_code == 200:
-            return json.loads(res.content.decode('utf-8'))
+            return res.json()
         return None
 
-    def create_and_save_history_df(self):
-        df = self.history()
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        df.set_index('time', inplace=True)
-        df.to_csv("EURGBP_price_history.csv")
+    def create_and_save_history_df(self, store=None):
+        # appends the new ticks to the local tick store, then returns the whole session
+        import pandas as pd
+        from tickstore import TickStore
+        store = store if store is not None else TickStore()
+        store.sync(self)
+        view = store.view()
+        df = pd.DataFrame({'price': view['price']},
+                          index=pd.to_datetime(view['time'], unit='s'))
+        df.index.name = 'time'
         return df
 
     def func_first_strat(self):
+        import numpy as np
+        from tickstore import TickStore
         capital_gbp = 1000000  # Capital initial
         eur_position = 0
 
         # 1. Charger l'historique des prix depuis le lancement
-        df_history = pd.read_csv("EURGBP_price_history.csv", parse_dates=['time'], index_col='time')
-        prices = df_history['price'].values
+        store = TickStore()
+        if len(store) == 0:
+            store.sync(self)
+        prices = store.prices()
         # 2. Calculer la moyenne et la volatilité du marché "normal"
         baseline = np.mean(prices)
         volatility = np.std(prices)
@@ -90,25 +111,23 @@ class API_MS:
         # 3. Boucle d'attente active jusqu'à l'événement Brexit (boom +10%)
         print("⚡️En attente d'un mouvement majeur (ex : Brexit)...")
         while True:
-            current_price = self.get_price()
-            if not current_price:
+            price_data = self.get_price()
+            if not price_data or not price_data.get("price"):
                 time.sleep(0.5)
                 continue
+            current_price = float(price_data["price"])
 
             # Critère simple : prix bondit de plus de 10% par rapport à la moyenne
             if current_price / baseline > 1.10:
                 print(f"🚨 Detected BREXIT EVENT! Prix actuel {current_price:.5f} > +10% de la moyenne.")
-                # Achat maxi en EUR tant qu'on a le capital
-                while capital_gbp > 100000 * current_price:
-                    exec_price = self.trade(100000, Side.BUY)
-                    if exec_price:
-                        print(f"Acheté 100k EUR à {exec_price}")
-                        capital_gbp -= 100000 * float(exec_price)
-                        eur_position += 100000
-                        time.sleep(0.5)  # petite pause pour ne pas spammer l'API
-                    else:
-                        print("Erreur lors du trade !")
-                        break
+                # Achat maxi en EUR d'un coup : ordres de 100k GBP max envoyés en parallèle
+                report = Executor(self, 100000).execute(capital_gbp / current_price, Side.BUY, current_price)
+                for qty, px in report["fills"]:
+                    print(f"Acheté {qty:,.0f} EUR à {px}")
+                    capital_gbp -= qty * px
+                    eur_position += qty
+                if report["failed"]:
+                    print(f"Erreur lors du trade ! {len(report['failed'])} ordre(s) rejeté(s)")
                 print("Fin de la prise de position sur événement.")
                 break  # Fin de la stratégie, passera à la gestion post-événement si tu veux
 
@@ -0,0 +1,172 @@
+# analytics.py
+# Trade analytics on columnar data: realized / unrealized PnL, per-mode attribution,
+# slippage against the quoted price and drawdown.
+#
+# Sources:
+#   - our own fills from a telemetry event log (run_strat.py --events FILE); these carry
+#     the quote the decision was made on and the Strategy mode
+#   - /tradeHistory (any trader), optionally with quotes attached from a price series
+#
+#   python analytics.py events.jsonl
+#   python analytics.py --server [--trader ID] [--quotes EURGBP_prices.bin]
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+FILL_COLUMNS = ["time", "qty", "sign", "price", "quote", "mode"]
+
+
+def trades_frame(trades, trader_id=None):
+    # /tradeHistory rows -> fills frame; quote/mode are unknown there
+    df = pd.DataFrame(trades)
+    if trader_id is not None and len(df):
+        df = df[df["User_name"] == trader_id]
+    if not len(df):
+        return pd.DataFrame(columns=FILL_COLUMNS)
+    out = pd.DataFrame({
+        "time": pd.to_numeric(df["time"], errors="coerce"),
+        "qty": pd.to_numeric(df["quantity"], errors="coerce"),
+        "sign": np.where(df["side"].to_numpy() == "buy", 1.0, -1.0),
+        "price": pd.to_numeric(df["rate"], errors="coerce"),
+        "quote": np.nan,
+        "mode": "unknown",
+    })
+    return out.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def load_events(path):
+    # Successful single and sliced trades from a telemetry.Telemetry JSON-lines log
+    ev = pd.read_json(path, lines=True)
+    if not len(ev) or "kind" not in ev:
+        return pd.DataFrame(columns=FILL_COLUMNS)
+    single = ev[ev["kind"] == "trade"]
+    if len(single):
+        single = single[single["ok"].astype(bool)]
+    sliced = ev[ev["kind"] == "sliced"]
+    if "filled" in sliced:
+        sliced = sliced[sliced["filled"] > 0]
+    parts = []
+    if len(single):
+        parts.append(pd.DataFrame({"time": single["ts"], "qty": single["qty"],
+                                   "side": single["side"], "price": single["fill"],
+                                   "quote": single["quote"], "mode": single.get("mode", "unknown")}))
+    if len(sliced):
+        parts.append(pd.DataFrame({"time": sliced["ts"], "qty": sliced["filled"],
+                                   "side": sliced["side"], "price": sliced["avg_price"],
+                                   "quote": sliced["quote"], "mode": sliced.get("mode", "unknown")}))
+    if not parts:
+        return pd.DataFrame(columns=FILL_COLUMNS)
+    df = pd.concat(parts, ignore_index=True)
+    df["price"] = df["price"].fillna(df["quote"])  # fill price missing from a response
+    df["sign"] = np.where(df.pop("side").to_numpy() == "buy", 1.0, -1.0)
+    df["mode"] = df["mode"].fillna("unknown")
+    return df[FILL_COLUMNS].sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def attach_quotes(fills, times, prices):
+    # quote = last price at or before each fill, e.g. from a TickStore / Recorder file
+    q = pd.DataFrame({"time": np.asarray(times, dtype=float), "q": np.asarray(prices, dtype=float)})
+    out = pd.merge_asof(fills.astype({"time": float}), q, on="time", direction="backward")
+    out["quote"] = out["quote"].fillna(out.pop("q"))
+    return out
+
+
+def _avg_cost(signed, price):
+    # Average-cost basis is path dependent (it resets whenever the position flips), so this
+    # one recurrence is a scalar pass over plain floats; everything else is vectorized.
+    n = len(signed)
+    realized = np.empty(n)
+    pos = avg = r = 0.0
+    for i, (d, px) in enumerate(zip(signed.tolist(), price.tolist())):
+        new = pos + d
+        if pos == 0.0 or (pos > 0) == (d > 0):          # opening or adding
+            avg = px if pos == 0.0 else (avg * pos + px * d) / new
+        else:                                            # reducing, closing or flipping
+            closed = min(abs(d), abs(pos))
+            r += closed * (px - avg) * (1.0 if pos > 0 else -1.0)
+            if abs(d) > abs(pos):
+                avg = px
+            elif new == 0.0:
+                avg = 0.0
+        pos = new
+        realized[i] = r
+    return realized
+
+
+def pnl(fills, mark=None):
+    # Per-fill columns: position, cash (GBP), equity, realized, unrealized, drawdown,
+    # contrib (that fill's PnL to `mark`) and slippage (GBP paid versus the quote).
+    df = fills.reset_index(drop=True).copy()
+    qty = df["qty"].to_numpy(dtype=float)
+    sign = df["sign"].to_numpy(dtype=float)
+    px = df["price"].to_numpy(dtype=float)
+    quote = df["quote"].to_numpy(dtype=float)
+    signed = sign * qty
+
+    pos = np.cumsum(signed)
+    cash = -np.cumsum(signed * px)
+    equity = cash + pos * px                 # marked at each fill's own price
+    realized = _avg_cost(signed, px)
+    df["position"] = pos
+    df["cash"] = cash
+    df["equity"] = equity
+    df["realized"] = realized
+    df["unrealized"] = equity - realized
+    df["drawdown"] = equity - np.maximum.accumulate(equity) if len(df) else equity
+    mark = float(px[-1]) if mark is None and len(df) else mark
+    df["contrib"] = signed * (mark - px) if mark is not None else np.nan
+    df["slippage"] = signed * (px - quote)  # NaN where no quote is known
+    return df
+
+
+def summary(fills, mark=None):
+    df = pnl(fills, mark)
+    if not len(df):
+        return {"trades": 0}, df
+    mark = float(df["price"].iloc[-1]) if mark is None else mark
+    total = float(df["cash"].iloc[-1] + df["position"].iloc[-1] * mark)
+    realized = float(df["realized"].iloc[-1])
+    by_mode = (df.groupby("mode")
+                 .agg(trades=("qty", "size"), volume=("qty", "sum"),
+                      pnl=("contrib", "sum"), slippage=("slippage", "sum")))
+    return {
+        "trades": len(df),
+        "volume_eur": float(df["qty"].sum()),
+        "position_eur": float(df["position"].iloc[-1]),
+        "mark": mark,
+        "pnl": total,
+        "realized": realized,
+        "unrealized": total - realized,
+        "slippage": float(np.nansum(df["slippage"].to_numpy())),
+        "max_drawdown": float(-df["drawdown"].min()),
+        "by_mode": by_mode.to_dict(orient="index"),
+    }, df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("events", nargs="?", help="telemetry JSON-lines file")
+    parser.add_argument("--server", action="store_true", help="use /tradeHistory instead")
+    parser.add_argument("--trader", default=None, help="trader id to keep from /tradeHistory")
+    parser.add_argument("--quotes", default=None, help="TickStore file to take quotes from")
+    parser.add_argument("--mark", type=float, default=None, help="price for unrealized PnL")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.server:
+        from algo import API_MS, TRADER_ID
+        api = API_MS()
+        fills = trades_frame(api.client.get("/tradeHistory").json(), args.trader or TRADER_ID)
+    else:
+        fills = load_events(args.events)
+    if args.quotes:
+        from tickstore import TickStore
+        store = TickStore(args.quotes)
+        fills = attach_quotes(fills, store.times(), store.prices())
+    res, _ = summary(fills, args.mark)
+    print(json.dumps(res, indent=2, default=float))
+    print(f"({(time.perf_counter() - t0) * 1000:.0f} ms)")
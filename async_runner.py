@@ -0,0 +1,132 @@
+# async_runner.py
+# asyncio driver for strag.Strategy.
+# - polls through pricefeed.PriceFeed: each server tick is handled once, polls are timed
+#   to the server's tick cadence (a fixed cadence when responses carry no time)
+# - price and positions are fetched concurrently
+# - trades run as background tasks, so a slow POST never delays the next price poll
+# - at most max_inflight trades are outstanding; further orders wait for one to finish
+# - with strategy.coalesce, a tick's orders are netted (execution.OrderGateway) and the
+#   net goes out as one background task
+#
+# API_MS is synchronous (requests), so every call runs in the default thread pool.
+
+import asyncio
+import threading
+
+from execution import OrderGateway
+from pricefeed import PriceFeed
+
+
+class AsyncRunner:
+    def __init__(self, strategy, period=1.0, max_inflight=4, feed=None):
+        self.strategy = strategy
+        self.api = strategy.api
+        self.period = period
+        self.max_inflight = max_inflight
+        self.inflight = set()
+        self.ticks = 0  # new server ticks handled
+        self.gateway = None  # OrderGateway when the strategy coalesces its orders
+        self._net_lock = threading.Lock()  # one netted flush at a time
+        self.feed = feed if feed is not None else PriceFeed(self.api, period=period,
+                                                            telemetry=strategy.telemetry)
+        strategy.feed = self.feed
+        strategy.defer_orders = True
+
+    @property
+    def late_ticks(self):
+        # fixed-cadence polls that started after their slot had already passed
+        return self.feed.counters["late"]
+
+    async def _trade(self, qty, side, price):
+        try:
+            resp = await asyncio.to_thread(self.api.trade, qty, side)
+        except Exception as e:
+            if self.strategy.show_log:
+                print(f"Error trading: {e}")
+            resp = None
+        self.strategy.settle(qty, side, price, resp)
+
+    def _net(self, orders, price):
+        # thread-pool side of a netted tick: submit + flush under one lock
+        with self._net_lock:
+            for qty, side, quote in orders:
+                self.gateway.submit(qty, side, quote)
+            return self.gateway.flush(price)
+
+    async def _trade_net(self, orders, price):
+        try:
+            fills = await asyncio.to_thread(self._net, orders, price)
+        except Exception as e:
+            if self.strategy.show_log:
+                print(f"Error trading: {e}")
+            fills = [(qty, side, quote, 0.0, None) for qty, side, quote in orders]
+        for fill in fills:
+            self.strategy.settle_fill(*fill)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.inflight.add(task)
+        task.add_done_callback(self.inflight.discard)
+
+    async def _dispatch(self, price=None):
+        strat = self.strategy
+        orders, strat.orders = strat.orders, []
+        if not orders:
+            return
+        if strat.coalesce:
+            gw = self.gateway
+            if gw is None or gw.executor.trade_gbp_limit != strat.trade_gbp_limit:
+                if gw is not None:
+                    with self._net_lock:
+                        gw.close()
+                self.gateway = OrderGateway(self.api, strat.trade_gbp_limit)
+            while len(self.inflight) >= self.max_inflight:  # backpressure
+                await asyncio.wait(self.inflight, return_when=asyncio.FIRST_COMPLETED)
+            self._spawn(self._trade_net(orders, price))
+            return
+        for qty, side, price in orders:
+            while len(self.inflight) >= self.max_inflight:  # backpressure
+                await asyncio.wait(self.inflight, return_when=asyncio.FIRST_COMPLETED)
+            self._spawn(self._trade(qty, side, price))
+
+    async def _positions(self):
+        try:
+            return await asyncio.to_thread(self.api.get_positions)
+        except Exception as e:
+            if self.strategy.show_log:
+                print(f"Error fetching positions: {e}")
+            return None
+
+    async def tick(self):
+        strat = self.strategy
+        fetches = [asyncio.to_thread(self.feed.poll)]  # None unless it is a new tick
+        if strat.sync_due():
+            # reconciling while our own trades are in flight would report false drift
+            if self.inflight:
+                await asyncio.wait(self.inflight)
+            fetches.append(self._positions())
+        res = await asyncio.gather(*fetches)
+        price_data = res[0]
+        if len(res) > 1 and res[1]:
+            strat.reconcile(res[1])
+        if price_data is not None:
+            strat.on_price(price_data)
+            await self._dispatch(float(price_data["price"]))
+            self.ticks += 1
+
+    async def run(self, max_ticks=None):
+        # max_ticks counts server ticks, not polls
+        print("Starting strategy (async)...")
+        try:
+            while max_ticks is None or self.ticks < max_ticks:
+                await self.tick()
+                await asyncio.sleep(self.feed.next_delay())
+        finally:
+            if self.inflight:
+                await asyncio.wait(self.inflight)
+            if self.gateway is not None:
+                self.gateway.close()
+
+
+def run_async(strategy, period=1.0, max_inflight=4):
+    asyncio.run(AsyncRunner(strategy, period, max_inflight).run())
@@ -0,0 +1,168 @@
+# backtest.py
+# Offline replay of a price series through strag.Strategy.
+# Rolling EMA / volatility / high20 / low20 are computed in bulk with NumPy/pandas,
+# then the same Strategy.act() decision logic runs against a simulated book.
+#
+#   python backtest.py [EURGBP_price_history.csv]
+
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from execution import Executor
+from strag import CUSUM, Strategy
+from tickstore import TickStore
+
+EUR_SHARE_FLOOR = 0.30  # the game penalises EUR share below this
+
+
+class PaperBroker:
+    # Stand-in for algo.API_MS: fills every order in full at the last marked price.
+    def __init__(self, eur=0.0, gbp=1_000_000.0, pair="EURGBP"):
+        # eur/gbp are the base/quote amounts of `pair`
+        self.pair = pair
+        self.eur = float(eur)
+        self.gbp = float(gbp)
+        self.price = None
+        self.trades = 0
+        self._lock = threading.Lock()  # child orders may arrive from execution.Executor threads
+
+    def mark(self, price):
+        self.price = price
+
+    def get_price(self):
+        return {"price": self.price}
+
+    def get_positions(self):
+        return {self.pair[:3]: self.eur, self.pair[3:]: self.gbp}
+
+    def trade(self, qty, side):
+        if self.price is None or qty <= 0:
+            return None
+        with self._lock:
+            if side == "buy":
+                self.eur += qty
+                self.gbp -= qty * self.price
+            else:
+                self.eur -= qty
+                self.gbp += qty * self.price
+            self.trades += 1
+        return {"success": True, "price": self.price, "quantity": qty, "side": side}
+
+    def value(self, price):
+        return self.gbp + price * self.eur
+
+
+def load_prices(path="EURGBP_price_history.csv"):
+    # .bin files are tickstore.TickStore files (memory-mapped), anything else a time,price CSV
+    if path.endswith(".bin"):
+        return TickStore(path).prices()
+    return pd.read_csv(path)["price"].to_numpy(dtype=float)
+
+
+def features(prices, ema_len=30, vol_len=40, breakout_len=20):
+    # Bulk equivalent of strag.Stats, value at index i = state after Stats.update(prices[i])
+    prices = np.asarray(prices, dtype=float)
+    p = pd.Series(prices)
+    r = np.zeros(len(prices))
+    r[1:] = np.log(prices[1:] / prices[:-1])
+
+    ema = p.ewm(alpha=2 / (ema_len + 1), adjust=False).mean().to_numpy()
+    # Stats.returns holds the last vol_len returns, which start at tick 1
+    sigma = np.zeros(len(prices))
+    if len(prices) > 1:
+        std = pd.Series(r[1:]).rolling(vol_len, min_periods=2).std().to_numpy()
+        sigma[1:] = np.nan_to_num(std, nan=0.0)
+    high = p.rolling(breakout_len, min_periods=1).max().to_numpy()
+    low = p.rolling(breakout_len, min_periods=1).min().to_numpy()
+    n_returns = np.minimum(np.arange(len(prices)), vol_len)
+    return {"r": r, "ema": ema, "sigma_r": sigma, "high": high, "low": low,
+            "n_returns": n_returns}
+
+
+def cusum_signals(r, sigma_r, start, k_mult=0.2, h_mult=3.0):
+    # Same recursion as strag.CUSUM from tick `start` on; thresholds are frozen
+    # from the first non-zero volatility, as in Strategy.signals().
+    out = np.zeros(len(r), dtype=np.int8)
+    k = h = 0.0
+    pos = neg = 0.0
+    for i in range(start, len(r)):
+        if h == 0.0:
+            k, h = k_mult * sigma_r[i], h_mult * sigma_r[i]
+        x = r[i]
+        pos = max(0.0, pos + x - k)
+        neg = min(0.0, neg + x + k)
+        up, down = pos > h, neg < -h
+        if up: pos = 0.0
+        if down: neg = 0.0
+        out[i] = 1 if up else (-1 if down else 0)
+    return out
+
+
+def strategy_features(strat, prices):
+    st = strat.stats
+    return features(prices, ema_len=st.ema_len, vol_len=st.returns.maxlen,
+                    breakout_len=st.breakout_len)
+
+
+def run_backtest(prices, strategy=None, eur=0.0, gbp=1_000_000.0, feats=None):
+    # feats: output of strategy_features(), to share the bulk pass across runs
+    t0 = time.perf_counter()
+    prices = np.asarray(prices, dtype=float)
+    broker = PaperBroker(eur, gbp)
+    strat = strategy if strategy is not None else Strategy(api=broker)
+    strat.api = broker
+    strat.executor = Executor(broker, strat.trade_gbp_limit, max_workers=1)  # fills are instant here
+
+    f = feats if feats is not None else strategy_features(strat, prices)
+    ready = np.flatnonzero(f["n_returns"] >= strat.warmup)
+    start = int(ready[0]) if len(ready) else len(prices)
+    if isinstance(strat.cusum, CUSUM):
+        cus = cusum_signals(f["r"], f["sigma_r"], start, strat.cusum.k_mult, strat.cusum.h_mult)
+    else:  # a detectors.Detector sees the same returns as in Strategy.signals()
+        cus = np.zeros(len(prices), dtype=np.int8)
+        cus[start:] = strat.cusum.detect(f["r"][start:])
+
+    i = start
+    if strat.risk is not None:
+        strat.risk.clock = lambda: float(i)  # one tick per second, as live
+
+    v0 = broker.value(prices[0]) if len(prices) else 0.0
+    peak, max_dd, violations = v0, 0.0, 0
+    for i in range(start, len(prices)):
+        price = float(prices[i])
+        broker.mark(price)
+        strat.act(price, f["sigma_r"][i], f["ema"][i], f["high"][i], f["low"][i], int(cus[i]))
+        v = broker.value(price)
+        peak = max(peak, v)
+        if peak > 0:
+            max_dd = max(max_dd, (peak - v) / peak)
+        if v <= 0 or price * broker.eur / v < EUR_SHARE_FLOOR:
+            violations += 1
+
+    last = float(prices[-1]) if len(prices) else 0.0
+    v1 = broker.value(last)
+    return {
+        "ticks": len(prices),
+        "trades": broker.trades,
+        "eur": broker.eur,
+        "gbp": broker.gbp,
+        "pnl": v1 - v0,
+        "max_drawdown": max_dd,
+        "eur_share": 0.0 if v1 <= 0 else last * broker.eur / v1,
+        "share_violations": violations,  # ticks spent below EUR_SHARE_FLOOR
+        "risk": dict(strat.risk.counters) if strat.risk is not None else {},
+        "normalized_capital": 0.0 if v0 <= 0 else 1_000_000 * v1 / v0,
+        "elapsed_ms": 1000 * (time.perf_counter() - t0),
+    }
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else "EURGBP_price_history.csv"
+    res = run_backtest(load_prices(path))
+    print(f"Ticks: {res['ticks']}  Trades: {res['trades']}  ({res['elapsed_ms']:.1f} ms)")
+    print(f"PnL: {res['pnl']:,.2f} GBP  Max drawdown: {res['max_drawdown']:.2%}  "
+          f"EUR share: {res['eur_share']:.2%} ({res['share_violations']} ticks < {EUR_SHARE_FLOOR:.0%})  "
+          f"Normalized capital: {res['normalized_capital']:,.2f}")
@@ -0,0 +1,189 @@
+# bench.py
+# Latency / throughput benchmarks for the trading loop, run against mock_server.py.
+# Results go to a JSON file so runs can be compared.
+#
+#   python bench.py                      # -> bench_results.json
+#   python bench.py --quick --out a.json
+#
+# Sections:
+#   micro      ns per Stats.update / vol / high20 / CUSUM.update
+#   sync_loop  per-tick latency (get_price + on_tick) and HTTP round trip per endpoint,
+#              against a fast, a slow and a flaky server
+#   max_rate   ticks per second with no sleep between ticks
+#   memory     traced memory growth over a long offline session
+#   recorder   database.Recorder poll latency and memory (the core of stream_api_to_dataframe)
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from algo import API_MS
+from backtest import PaperBroker
+from database import Recorder
+from http_client import Client
+from mock_server import Game, start_server, synthetic_path
+from strag import CUSUM, Stats, Strategy
+
+SCENARIOS = {
+    "fast": {},
+    "slow": {"latency": 0.05, "jitter": 0.02},
+    "flaky": {"latency": 0.005, "timeout_rate": 0.01, "hang": 3.0},
+}
+
+
+class TimedClient(Client):
+    # Client that records the wall time of every request, keyed by endpoint
+    def __init__(self, base_url, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.samples = defaultdict(list)
+
+    def request(self, method, path, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return super().request(method, path, **kwargs)
+        finally:
+            self.samples[path.strip("/").split("/")[0]].append(time.perf_counter() - t0)
+
+
+def summary(seconds):
+    if not len(seconds):
+        return {"n": 0}
+    ms = np.asarray(seconds) * 1000
+    return {"n": len(ms), "mean_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)),
+            "p99_ms": float(np.percentile(ms, 99)), "max_ms": float(ms.max())}
+
+
+def bench_micro(n=100_000):
+    prices = synthetic_path(n + 1000, seed=1).tolist()
+    res = {}
+    for vol_len in (40, 10_000):
+        st = Stats(vol_len=vol_len, breakout_len=vol_len)
+        for p in prices[:1000]:
+            st.update(p)
+        it = iter(prices[1000:])
+        res[f"stats_update_ns[{vol_len}]"] = 1e9 * timeit.timeit(lambda: st.update(next(it)), number=n) / n
+        res[f"stats_vol_ns[{vol_len}]"] = 1e9 * timeit.timeit(st.vol, number=n) / n
+        res[f"stats_high20_ns[{vol_len}]"] = 1e9 * timeit.timeit(st.high20, number=n) / n
+    cus = CUSUM()
+    cus.set_from_vol(2e-4)
+    r = np.diff(np.log(prices)).tolist()
+    it = iter(r)
+    res["cusum_update_ns"] = 1e9 * timeit.timeit(lambda: cus.update(next(it)), number=n) / n
+    return res
+
+
+def _live_strategy(url):
+    client = TimedClient(url)
+    strat = Strategy(api=API_MS(client=client, url=url))
+    strat.warm_start(synthetic_path(200, seed=2))  # trade from the first tick
+    return strat, client
+
+
+def bench_sync_loop(url, ticks):
+    strat, client = _live_strategy(url)
+    tick, decide = [], []
+    for _ in range(ticks):
+        t0 = time.perf_counter()
+        data = strat.api.get_price()
+        t1 = time.perf_counter()
+        if data and data.get("price"):
+            strat.on_tick(float(data["price"]))
+        t2 = time.perf_counter()
+        tick.append(t2 - t0)
+        decide.append(t2 - t1)
+    return {"tick": summary(tick), "on_tick": summary(decide),
+            "http": {k: summary(v) for k, v in client.samples.items()}}
+
+
+def bench_max_rate(url, seconds):
+    # same work as Strategy.run() with no sleep between ticks
+    strat, _ = _live_strategy(url)
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        data = strat.api.get_price()
+        if data and data.get("price"):
+            strat.on_tick(float(data["price"]))
+        n += 1
+    return {"ticks_per_s": n / (time.perf_counter() - t0)}
+
+
+def bench_memory(ticks):
+    prices = synthetic_path(ticks, shift_at=ticks // 2, seed=3)
+    broker = PaperBroker()
+    strat = Strategy(api=broker)
+    tracemalloc.start()
+    base = None
+    t0 = time.perf_counter()
+    for i, p in enumerate(prices.tolist()):
+        broker.mark(p)
+        strat.on_tick(p)
+        if i == ticks // 10:
+            base = tracemalloc.get_traced_memory()[0]
+    end, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ticks": ticks, "us_per_tick": 1e6 * (time.perf_counter() - t0) / ticks,
+            "growth_bytes": end - base, "peak_bytes": peak}
+
+
+def bench_recorder(url, polls):
+    with tempfile.TemporaryDirectory() as tmp:
+        client = TimedClient(url)
+        rec = Recorder(os.path.join(tmp, "ticks.bin"), api=API_MS(client=client, url=url))
+        tracemalloc.start()
+        lat = []
+        for i in range(polls):
+            t0 = time.perf_counter()
+            rec.poll()
+            lat.append(time.perf_counter() - t0)
+            if i == polls // 10:
+                base = tracemalloc.get_traced_memory()[0]
+        end = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        rec.close()
+        return {"poll": summary(lat), "growth_bytes": end - base, "written": rec.written}
+
+
+def main(quick=False):
+    scale = 0.2 if quick else 1.0
+    results = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+               "machine": platform.machine(), "quick": quick}
+    results["micro"] = bench_micro(int(100_000 * scale))
+    results["memory"] = bench_memory(int(200_000 * scale))
+
+    results["sync_loop"] = {}
+    for name, faults in SCENARIOS.items():
+        game = Game(synthetic_path(100_000, seed=4), speed=1000)
+        server, url = start_server(game, **faults)
+        try:
+            ticks = int((1000 if name == "fast" else 200) * scale)
+            results["sync_loop"][name] = bench_sync_loop(url, ticks)
+            if name == "fast":
+                results["max_rate"] = bench_max_rate(url, 5 * scale)
+                results["recorder"] = bench_recorder(url, int(2000 * scale))
+        finally:
+            server.shutdown()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--quick", action="store_true", help="about 5x fewer iterations")
+    args = parser.parse_args()
+    res = main(args.quick)
+    with open(args.out, "w") as fh:
+        json.dump(res, fh, indent=2)
+    for name, r in res["sync_loop"].items():
+        print(f"{name:6} tick p50 {r['tick']['p50_ms']:.2f} ms  p99 {r['tick']['p99_ms']:.2f} ms  "
+              f"on_tick p99 {r['on_tick']['p99_ms']:.2f} ms")
+    print(f"max rate {res['max_rate']['ticks_per_s']:.0f} ticks/s  "
+          f"memory growth {res['memory']['growth_bytes']} B over {res['memory']['ticks']} ticks")
+    print(f"-> {args.out}")
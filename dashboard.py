@@ -1,63 +1,46 @@
 # pro_dashboard.py
 # Full dashboard: price, positions, EUR%, PnL, normalized capital, leaderboard, recent trades
 # pip install requests
+#
+# Each endpoint is polled by its own thread on its own cadence, so one slow call never
+# holds up the others; the screen is redrawn from the latest values, touching only the
+# lines that changed (ANSI escapes, no `clear`).
 
+import heapq
 import os
+import sys
+import threading
 import time
-import requests
 from datetime import datetime
+from http_client import get_client
 
-URL = "http://fx-trading-game-ensimag-challenge.westeurope.azurecontainer.io:443"
-PRODUCT = "EURGBP"
+URL = os.environ.get("FX_URL", "http://fx-trading-game-ensimag-challenge.westeurope.azurecontainer.io:443")
+PRODUCT = os.environ.get("FX_PAIR", "EURGBP")  # e.g. FX_PAIR=EURUSD python dashboard.py
+BASE, QUOTE = PRODUCT[:3], PRODUCT[3:]
 TRADER_ID = "yhhwsgzliKCtrelXLf48EoRuYeb9lPo8"
 REFRESH_SECONDS = 1
+# per-endpoint poll cadence (seconds)
+PRICE_EVERY = 1
+POSITIONS_EVERY = 1
+CAPITALS_EVERY = 2
+TRADES_EVERY = 3
 
 # PnL baseline mode:
 USE_FIXED_BASELINE = False           # True -> use FIXED_BASELINE_EUR_EQUIV; False -> first read from server
 FIXED_BASELINE_EUR_EQUIV = 1_000_000
 
 # =============== API ===============
-def get_price():
+def _get_json(path):
+    # parsed body, or None on any failure so pollers keep their last good value
     try:
-        r = requests.get(f"{URL}/price/{PRODUCT}", timeout=3)
+        r = get_client(URL).get(path, retries=0)
         if r.status_code == 200:
-            j = r.json()
-            return j.get("price"), j.get("time")
+            return r.json()
     except Exception:
         pass
-    return None, None
-
-def get_positions():
-    try:
-        r = requests.get(f"{URL}/positions/{TRADER_ID}", timeout=3)
-        if r.status_code == 200:
-            return r.json()  # {"EUR": ..., "GBP": ...}
-    except Exception:
-        pass
-    return {}
-
-def get_normalized_capitals():
-    try:
-        r = requests.get(f"{URL}/normalizedCapitals", timeout=3)
-        if r.status_code == 200:
-            return r.json()  # { "Trader1": 1000000.12, ... } in GBP
-    except Exception:
-        pass
-    return {}
-
-def get_trade_history():
-    try:
-        r = requests.get(f"{URL}/tradeHistory", timeout=3)
-        if r.status_code == 200:
-            return r.json()  # list of trades
-    except Exception:
-        pass
-    return []
+    return None
 
 # =============== Helpers ===============
-def clear():
-    os.system("cls" if os.name == "nt" else "clear")
-
 def eur_equiv(eur_units, gbp_units, price):
     if not price or price <= 0:
         return None
@@ -101,100 +84,183 @@ def last_trade_snapshot(trades):
     except Exception:
         return None
 
+def top5(capitals):
+    # Leaderboard: 5 largest normalized capitals, O(n log 5) instead of a full sort
+    try:
+        return [(k, v) for v, k in heapq.nlargest(5, ((float(v), k) for k, v in capitals.items()))]
+    except Exception:
+        return []
+
+class TradeHistoryCache:
+    # /tradeHistory only ever grows: keep the count and last trade, and look at new rows only
+    def __init__(self):
+        self.count = 0
+        self.last = None
+
+    def update(self, trades):
+        if not isinstance(trades, list):
+            return
+        if len(trades) < self.count:  # server restarted
+            self.count, self.last = 0, None
+        if len(trades) > self.count:
+            self.last = last_trade_snapshot(trades[self.count:])
+            self.count = len(trades)
+
+# =============== Polling ===============
+STATE = {}
+STATE_LOCK = threading.Lock()
+
+class Poller(threading.Thread):
+    def __init__(self, name, fetch, every):
+        super().__init__(daemon=True)
+        self.name, self.fetch, self.every = name, fetch, every
+
+    def run(self):
+        while True:
+            t0 = time.monotonic()
+            value = self.fetch()
+            if value is not None:
+                with STATE_LOCK:
+                    STATE[self.name] = value
+            time.sleep(max(0.0, self.every - (time.monotonic() - t0)))
+
+def poll_price():
+    j = _get_json(f"/price/{PRODUCT}")
+    return (j.get("price"), j.get("time")) if isinstance(j, dict) else None
+
+def poll_positions():
+    j = _get_json(f"/positions/{TRADER_ID}")
+    return j if isinstance(j, dict) else None
+
+def poll_capitals():
+    j = _get_json("/normalizedCapitals")
+    if not isinstance(j, dict):
+        return None
+    mine = None
+    try:
+        mine = float(j[TRADER_ID]) if TRADER_ID in j else None
+    except Exception:
+        pass
+    return mine, top5(j)
+
+_trades = TradeHistoryCache()
+
+def poll_trades():
+    j = _get_json("/tradeHistory")
+    if not isinstance(j, list):
+        return None
+    _trades.update(j)
+    return _trades.count, _trades.last
+
+def start_pollers():
+    for name, fetch, every in (("price", poll_price, PRICE_EVERY),
+                               ("positions", poll_positions, POSITIONS_EVERY),
+                               ("capitals", poll_capitals, CAPITALS_EVERY),
+                               ("trades", poll_trades, TRADES_EVERY)):
+        Poller(name, fetch, every).start()
+
+# =============== Screen ===============
+class Screen:
+    # Redraws only the lines that differ from the previous frame
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.prev = None
+        if os.name == "nt":
+            os.system("")  # turns on ANSI escape handling in the Windows console
+
+    def draw(self, lines):
+        parts = []
+        if self.prev is None:
+            parts.append("\x1b[2J")
+            self.prev = []
+        for i, line in enumerate(lines):
+            if i >= len(self.prev) or self.prev[i] != line:
+                parts.append(f"\x1b[{i + 1};1H{line}\x1b[K")
+        for i in range(len(lines), len(self.prev)):
+            parts.append(f"\x1b[{i + 1};1H\x1b[K")
+        parts.append(f"\x1b[{len(lines) + 1};1H")
+        self.out.write("".join(parts))
+        self.out.flush()
+        self.prev = list(lines)
+
 # =============== Main loop ===============
+def render(price, ts, eur_units, gbp_units, baseline_eur_equiv, my_norm_gbp, leaderboard,
+           recent_count, last_t):
+    te = eur_equiv(eur_units, gbp_units, price)  # total in EUR
+    tg = gbp_equiv(eur_units, gbp_units, price)  # total in GBP
+    share = eur_share(eur_units, gbp_units, price)
+
+    pnl_abs = pnl_pct = None
+    if baseline_eur_equiv and te is not None:
+        pnl_abs = te - baseline_eur_equiv
+        pnl_pct = 100.0 * pnl_abs / baseline_eur_equiv
+
+    lines = ["=== Morgan Stanley Trading Game — Pro Dashboard ===",
+             f"Trader ID: {TRADER_ID}     Time: {now_str()}",
+             "---------------------------------------------------",
+             f" Live Price ({PRODUCT}):   {price if price is not None else '-'}   (ts: {ts})",
+             "---------------------------------------------------",
+             f" {BASE}:                   {fmt(eur_units, 2)}",
+             f" {QUOTE}:                   {fmt(gbp_units, 2)}"]
+    if share is not None:
+        status = "OK" if share >= 0.30 else "WARNING < 30%"
+        lines.append(f" {BASE} Share:             {share*100:5.2f}%   [{status}]")
+    else:
+        lines.append(f" {BASE} Share:             -")
+    lines += [f" Total ({BASE} equiv):     {fmt(te, 2)}",
+              f" Total ({QUOTE} equiv):     {fmt(tg, 2)}",
+              "---------------------------------------------------"]
+    if baseline_eur_equiv is not None:
+        lines.append(f" Baseline ({BASE} equiv):  {fmt(baseline_eur_equiv, 2)}")
+    else:
+        lines.append(f" Baseline ({BASE} equiv):  waiting for first valid read...")
+    if pnl_abs is not None:
+        sign = "+" if pnl_abs >= 0 else ""
+        lines.append(f" PnL:                   {sign}{fmt(pnl_abs, 2)} {BASE}  ({sign}{fmt(pnl_pct, 2)}%)")
+    else:
+        lines.append(" PnL:                   -")
+    lines += ["---------------------------------------------------",
+              f" Normalized Capital (GBP): {fmt(my_norm_gbp, 2)}"]
+    if leaderboard:
+        lines.append(" Leaderboard (Top 5 by normalized GBP):")
+        for rank, (name, val) in enumerate(leaderboard, start=1):
+            mark = "← you" if name == TRADER_ID else ""
+            lines.append(f"   {rank}. {name[:24]:24}  {fmt(val, 2)} {mark}")
+    else:
+        lines.append(" Leaderboard:           -")
+    lines += ["---------------------------------------------------",
+              f" Recent trades:         {recent_count}"]
+    if last_t:
+        lines.append(f" Last trade:            {last_t.get('pair')} {last_t.get('side')} "
+                     f"{last_t.get('qty')} @ {last_t.get('rate')}  by {last_t.get('user')}  (t={last_t.get('time')})")
+    else:
+        lines.append(" Last trade:            -")
+    lines.append("===================================================")
+    return lines
+
 def main():
     baseline_eur_equiv = None
     if USE_FIXED_BASELINE:
         baseline_eur_equiv = FIXED_BASELINE_EUR_EQUIV
 
+    start_pollers()
+    screen = Screen()
     while True:
-        price, ts = get_price()
-        pos = get_positions()
-        eur_units = float(pos.get("EUR", 0.0))
-        gbp_units = float(pos.get("GBP", 0.0))
-
-        te = eur_equiv(eur_units, gbp_units, price)  # total in EUR
-        tg = gbp_equiv(eur_units, gbp_units, price)  # total in GBP
-        share = eur_share(eur_units, gbp_units, price)
+        with STATE_LOCK:
+            price, ts = STATE.get("price", (None, None))
+            pos = STATE.get("positions", {})
+            my_norm_gbp, leaderboard = STATE.get("capitals", (None, []))
+            recent_count, last_t = STATE.get("trades", (0, None))
+        eur_units = float(pos.get(BASE, 0.0))
+        gbp_units = float(pos.get(QUOTE, 0.0))
 
         # Initialize baseline from first valid total if using auto-baseline
+        te = eur_equiv(eur_units, gbp_units, price)
         if not USE_FIXED_BASELINE and baseline_eur_equiv is None and te is not None and te > 0:
             baseline_eur_equiv = te
 
-        pnl_abs = pnl_pct = None
-        if baseline_eur_equiv and te is not None:
-            pnl_abs = te - baseline_eur_equiv
-            pnl_pct = 100.0 * pnl_abs / baseline_eur_equiv
-
-        capitals = get_normalized_capitals()
-        my_norm_gbp = None
-        if isinstance(capitals, dict) and TRADER_ID in capitals:
-            try:
-                my_norm_gbp = float(capitals[TRADER_ID])
-            except Exception:
-                my_norm_gbp = None
-
-        # Leaderboard top 5
-        leaderboard = []
-        if isinstance(capitals, dict) and capitals:
-            try:
-                leaderboard = sorted(
-                    [(k, float(v)) for k, v in capitals.items()],
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:5]
-            except Exception:
-                leaderboard = []
-
-        trades = get_trade_history()
-        recent_count = len(trades) if isinstance(trades, list) else 0
-        last_t = last_trade_snapshot(trades)
-
-        # Render
-        clear()
-        print("=== Morgan Stanley Trading Game — Pro Dashboard ===")
-        print(f"Trader ID: {TRADER_ID}     Time: {now_str()}")
-        print("---------------------------------------------------")
-        print(f" Live Price (EURGBP):   {price if price is not None else '-'}   (ts: {ts})")
-        print("---------------------------------------------------")
-        print(f" EUR:                   {fmt(eur_units, 2)}")
-        print(f" GBP:                   {fmt(gbp_units, 2)}")
-        if share is not None:
-            status = "OK" if share >= 0.30 else "WARNING < 30%"
-            print(f" EUR Share:             {share*100:5.2f}%   [{status}]")
-        else:
-            print(" EUR Share:             -")
-        print(f" Total (EUR equiv):     {fmt(te, 2)}")
-        print(f" Total (GBP equiv):     {fmt(tg, 2)}")
-        print("---------------------------------------------------")
-        if baseline_eur_equiv is not None:
-            print(f" Baseline (EUR equiv):  {fmt(baseline_eur_equiv, 2)}")
-        else:
-            print(" Baseline (EUR equiv):  waiting for first valid read...")
-        if pnl_abs is not None:
-            sign = "+" if pnl_abs >= 0 else ""
-            print(f" PnL:                   {sign}{fmt(pnl_abs, 2)} EUR  ({sign}{fmt(pnl_pct, 2)}%)")
-        else:
-            print(" PnL:                   -")
-        print("---------------------------------------------------")
-        print(f" Normalized Capital (GBP): {fmt(my_norm_gbp, 2)}")
-        if leaderboard:
-            print(" Leaderboard (Top 5 by normalized GBP):")
-            for rank, (name, val) in enumerate(leaderboard, start=1):
-                mark = "← you" if name == TRADER_ID else ""
-                print(f"   {rank}. {name[:24]:24}  {fmt(val, 2)} {mark}")
-        else:
-            print(" Leaderboard:           -")
-        print("---------------------------------------------------")
-        if last_t:
-            print(f" Recent trades:         {recent_count}")
-            print(f" Last trade:            {last_t.get('pair')} {last_t.get('side')} "
-                  f"{last_t.get('qty')} @ {last_t.get('rate')}  by {last_t.get('user')}  (t={last_t.get('time')})")
-        else:
-            print(f" Recent trades:         {recent_count}")
-            print(" Last trade:            -")
-        print("===================================================")
-
+        screen.draw(render(price, ts, eur_units, gbp_units, baseline_eur_equiv, my_norm_gbp,
+                           leaderboard, recent_count, last_t))
         time.sleep(REFRESH_SECONDS)
 
 if __name__ == "__main__":
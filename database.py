@@ -1,39 +1,122 @@
-import requests
-import pandas as pd
+import queue
+import threading
 import time
-from algo import  get_price
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from algo import API_MS
+from tickstore import TickStore, TICK_DTYPE
+
+PRICES_FILE = "EURGBP_prices.bin"
+
+
+def _to_epoch(t):
+    # the server's "time" field; fall back to local clock if missing or unparseable
+    if t is None:
+        return time.time()
+    try:
+        return float(t)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(t)).timestamp()
+    except ValueError:
+        return time.time()
 
-def stream_api_to_dataframe(interval=5):
+
+class Recorder:
     """
-    Continuously fetch data from API and append rows to a DataFrame.
-    
-    Parameters:
-        api_url (str): API endpoint.
-        interval (int): Time (seconds) between requests.
-    
-    Returns:
-        pd.DataFrame: Final DataFrame after manual stop (Ctrl+C).
+    Polls the live price into a preallocated buffer and flushes full chunks to a
+    TickStore file from a background thread. Memory stays at two chunks whatever the
+    session length, a crash loses at most one chunk (or flush_every seconds of ticks),
+    and restarting on the same file resumes it (ticks not newer than the last stored
+    one are skipped).
     """
-    df = pd.DataFrame()  # start empty
-    
-    try:
+
+    def __init__(self, path=PRICES_FILE, chunk_size=256, flush_every=30.0, api=None):
+        self.store = TickStore(path)
+        self.api = api if api is not None else API_MS()
+        self.chunk_size = chunk_size
+        self.flush_every = flush_every
+        self._last_flush = time.monotonic()
+        self._free = queue.Queue()
+        self._full = queue.Queue()
+        for _ in range(2):  # double buffering: fill one while the other is written
+            self._free.put(np.empty(chunk_size, dtype=TICK_DTYPE))
+        self._buf = self._free.get()
+        self._n = 0
+        self.count = 0    # ticks polled this session
+        self.written = 0  # ticks actually appended (duplicates of stored ticks are skipped)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
         while True:
-            data = get_price()
+            item = self._full.get()
+            if item is None:
+                return
+            buf, n = item
+            self.written += self.store.append(buf["time"][:n], buf["price"][:n])
+            self._free.put(buf)
+
+    def add(self, t, price):
+        self._buf[self._n] = (t, price)
+        self._n += 1
+        self.count += 1
+        if self._n == self.chunk_size or time.monotonic() - self._last_flush >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if self._n:
+            self._full.put((self._buf, self._n))
+            self._buf = self._free.get()  # blocks only if the writer is a whole chunk behind
+            self._n = 0
+
+    def close(self):
+        self.flush()
+        self._full.put(None)
+        self._writer.join()
+
+    def poll(self):
+        data = self.api.get_price()
+        if data and data.get("price") is not None:
+            self.add(_to_epoch(data.get("time")), float(data["price"]))
+            return True
+        return False
+
+    def run(self, interval=5):
+        try:
+            while True:
+                if self.poll():
+                    print(f"Row added. Total rows: {self.count}")
+                time.sleep(interval)  # wait before next fetch
+        except KeyboardInterrupt:
+            print("Stopped streaming.")
+        finally:
+            self.close()
 
-            row = pd.DataFrame([data])
 
-            # Append row
-            df = pd.concat([df, row], ignore_index=True)
+def stream_api_to_dataframe(interval=5, path=PRICES_FILE):
+    """
+    Continuously fetch prices from the API into the tick file at `path`.
+
+    Parameters:
+        interval (int): Time (seconds) between requests.
+        path (str): TickStore file, resumed if it already exists.
+
+    Returns:
+        pd.DataFrame: Every tick in the file after manual stop (Ctrl+C).
+    """
+    rec = Recorder(path)
+    rec.run(interval)
+    view = rec.store.view()
+    return pd.DataFrame({"time": pd.to_datetime(view["time"], unit="s"), "price": view["price"]})
 
-            print(f"Row added. Total rows: {len(df)}")
-            # print(row)
 
-            time.sleep(interval)  # wait before next fetch
-    
-    except KeyboardInterrupt:
-        print("Stopped streaming.")
-        return df
-    
-# Example with EURGBP price API
-df = stream_api_to_dataframe(interval=2)
-df.to_csv("EURGBP_prices.csv", index=False)  # Save to CSV
\ No newline at end of file
+if __name__ == '__main__':
+    # Example with EURGBP price API
+    df = stream_api_to_dataframe(interval=2)
+    print(df.tail())
@@ -0,0 +1,445 @@
+# detectors.py
+# Regime-change detectors on log returns.
+# Every detector has a streaming update(r) -> +1 (up move) / -1 (down move) / 0 and a
+# batch detect(returns) -> int8 array that gives the same alarms as calling update() on
+# each return of a freshly reset detector.
+#
+#   AdaptiveCUSUM  CUSUM with k, h in units of an EWMA volatility (strag.CUSUM freezes them)
+#   FixedCUSUM     strag.CUSUM behaviour: k, h frozen from the volatility at warm-up
+#   PageHinkley    Page-Hinkley test on volatility-scaled returns
+#   RollingZ       |return| against a trailing window, with a cooldown
+#   BOCPD          Bayesian online changepoint detection (Adams & MacKay 2007)
+#
+# Any of them can replace strag.CUSUM:  Strategy(detector=AdaptiveCUSUM()).
+#
+# evaluate() injects jumps into EURGBP_price_history.csv and reports detection delay and
+# false-alarm rate:  python detectors.py
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def ewma_alpha(halflife):
+    return 1 - 0.5 ** (1 / halflife)
+
+
+def prior_vol(r, halflife=100, warmup=30):
+    # sigma_t from returns strictly before t (EWMA of r^2), NaN during warm-up
+    r = np.asarray(r, dtype=float)
+    var = pd.Series(r * r).ewm(alpha=ewma_alpha(halflife), adjust=False).mean().to_numpy()
+    sigma = np.full(len(r), np.nan)
+    if len(r) > warmup:
+        sigma[warmup:] = np.sqrt(var[warmup - 1:-1])
+    sigma[sigma == 0] = np.nan
+    return sigma
+
+
+class VolScale:
+    # Streaming counterpart of prior_vol()
+    def __init__(self, halflife=100, warmup=30):
+        self.alpha = ewma_alpha(halflife)
+        self.warmup = warmup
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.var = None
+
+    def update(self, r):
+        # returns sigma before r (None during warm-up), then folds r in
+        sigma = math.sqrt(self.var) if self.n >= self.warmup and self.var else None
+        self.var = r * r if self.var is None else self.alpha * r * r + (1 - self.alpha) * self.var
+        self.n += 1
+        return sigma
+
+
+def _first_above(values, limit):
+    idx = np.flatnonzero(values > limit)
+    return int(idx[0]) if len(idx) else -1
+
+
+def lindley(x, h):
+    # S_t = max(0, S_{t-1} + x_t), alarm and reset to 0 when S_t > h_t -> (S, alarm indices).
+    # Between resets S_t = X_t + max(S_0, -min_{s<=t} X_s) with X the running sum, so each
+    # stretch is a couple of cumulative ops; the window doubles while there is no alarm.
+    n = len(x)
+    out = np.zeros(n)
+    alarms = []
+    start, s0, width = 0, 0.0, 64
+    while start < n:
+        end = min(n, start + width)
+        X = np.cumsum(x[start:end])
+        S = X + np.maximum(s0, -np.minimum.accumulate(X))
+        j = _first_above(S, h[start:end])
+        if j >= 0:
+            out[start:start + j] = S[:j]
+            alarms.append(start + j)
+            start, s0, width = start + j + 1, 0.0, 64
+        else:
+            out[start:end] = S
+            start, s0, width = end, float(S[-1]), width * 2
+    return out, alarms
+
+
+def _logsumexp(a):
+    m = a.max()
+    return m + math.log(np.exp(a - m).sum())
+
+
+def _combine(n, up, down):
+    out = np.zeros(n, dtype=np.int8)
+    out[down] = -1
+    out[up] = 1  # an up alarm wins a tie, as in strag.CUSUM
+    return out
+
+
+class Detector:
+    def reset(self):
+        raise NotImplementedError
+
+    def update(self, r):
+        raise NotImplementedError
+
+    def detect(self, returns):
+        # generic fallback: replay through update()
+        self.reset()
+        out = np.array([self.update(r) for r in np.asarray(returns, dtype=float).tolist()], dtype=np.int8)
+        self.reset()
+        return out
+
+
+class AdaptiveCUSUM(Detector):
+    def __init__(self, k_mult=0.5, h_mult=5.0, halflife=100, warmup=30):
+        self.k_mult, self.h_mult = k_mult, h_mult
+        self.scale = VolScale(halflife, warmup)
+        self.reset()
+
+    def reset(self):
+        self.scale.reset()
+        self.pos = self.neg = 0.0
+
+    def _sigma(self, r):
+        return self.scale.update(r)
+
+    def update(self, r):
+        sigma = self._sigma(r)
+        if not sigma:
+            return 0
+        k, h = self.k_mult * sigma, self.h_mult * sigma
+        self.pos = max(0.0, self.pos + r - k)
+        self.neg = min(0.0, self.neg + r + k)
+        up, down = self.pos > h, self.neg < -h
+        if up: self.pos = 0.0
+        if down: self.neg = 0.0
+        return 1 if up else (-1 if down else 0)
+
+    def _sigmas(self, r):
+        return prior_vol(r, halflife=math.log(0.5) / math.log(1 - self.scale.alpha),
+                         warmup=self.scale.warmup)
+
+    def detect(self, returns):
+        r = np.asarray(returns, dtype=float)
+        sigma = self._sigmas(r)
+        live = ~np.isnan(sigma)
+        k = np.where(live, self.k_mult * sigma, 0.0)
+        h = np.where(live, self.h_mult * sigma, np.inf)
+        up = lindley(np.where(live, r - k, 0.0), h)[1]
+        down = lindley(np.where(live, -r - k, 0.0), h)[1]
+        return _combine(len(r), up, down)
+
+
+class FixedCUSUM(AdaptiveCUSUM):
+    # strag.CUSUM as Strategy uses it: k, h set once from the warm-up volatility
+    def __init__(self, k_mult=0.2, h_mult=3.0, warmup=30):
+        super().__init__(k_mult, h_mult, warmup=warmup)
+        self.warmup = warmup
+
+    def reset(self):
+        super().reset()
+        self.sigma = None
+        self._buf = []
+
+    def _sigma(self, r):
+        if self.sigma is None:
+            self._buf.append(r)
+            if len(self._buf) > self.warmup:
+                self.sigma = float(np.std(self._buf[:-1], ddof=1)) or None
+        return self.sigma
+
+    def _sigmas(self, r):
+        sigma = np.full(len(r), np.nan)
+        if len(r) > self.warmup:
+            s = float(np.std(r[:self.warmup], ddof=1))
+            if s > 0:
+                sigma[self.warmup:] = s
+        return sigma
+
+
+class PageHinkley(Detector):
+    # On x = r / sigma_prior: m_t = sum(x - mean_t - delta), alarm when m_t - min m > lam.
+    # Each side keeps its own running mean and restarts after its alarm.
+    def __init__(self, delta=0.5, lam=8.0, halflife=100, warmup=30):
+        self.delta, self.lam = delta, lam
+        self.halflife, self.warmup = halflife, warmup
+        self.scale = VolScale(halflife, warmup)
+        self.reset()
+
+    def reset(self):
+        self.scale.reset()
+        self.sides = {1: [0, 0.0, 0.0, 0.0], -1: [0, 0.0, 0.0, 0.0]}  # n, mean, m, min m
+
+    def update(self, r):
+        sigma = self.scale.update(r)
+        if not sigma:
+            return 0
+        x = r / sigma
+        fired = {}
+        for sign, st in self.sides.items():
+            st[0] += 1
+            st[1] += (x - st[1]) / st[0]
+            st[2] += sign * (x - st[1]) - self.delta
+            st[3] = min(st[3], st[2])
+            fired[sign] = st[2] - st[3] > self.lam
+            if fired[sign]:
+                self.sides[sign] = [0, 0.0, 0.0, 0.0]
+        return 1 if fired[1] else (-1 if fired[-1] else 0)
+
+    def _side(self, x, live, sign):
+        n = len(x)
+        alarms = []
+        start, width = 0, 64
+        while start < n:
+            end = min(n, start + width)
+            seg, ok = x[start:end], live[start:end]
+            cnt = np.cumsum(ok)
+            mean = np.cumsum(np.where(ok, seg, 0.0)) / np.maximum(cnt, 1)
+            m = np.cumsum(np.where(ok, sign * (seg - mean) - self.delta, 0.0))
+            stat = m - np.minimum(0.0, np.minimum.accumulate(m))
+            j = _first_above(np.where(ok, stat, -np.inf), self.lam)
+            if j >= 0:
+                alarms.append(start + j)
+                start, width = start + j + 1, 64
+            elif end == n:
+                break
+            else:
+                width *= 2  # running mean depends on the stretch start: recompute it wider
+        return alarms
+
+    def detect(self, returns):
+        r = np.asarray(returns, dtype=float)
+        sigma = prior_vol(r, self.halflife, self.warmup)
+        live = ~np.isnan(sigma)
+        x = np.where(live, r / np.where(live, sigma, 1.0), 0.0)
+        return _combine(len(r), self._side(x, live, 1), self._side(x, live, -1))
+
+
+class RollingZ(Detector):
+    # z_t = (r_t - mean) / std over the previous `window` returns; alarm when |z| > thresh,
+    # then stay quiet for `cooldown` returns.
+    def __init__(self, window=40, thresh=4.0, cooldown=10):
+        self.window, self.thresh, self.cooldown = window, thresh, cooldown
+        self.reset()
+
+    def reset(self):
+        self.buf = deque()
+        self.s = self.s2 = 0.0
+        self.quiet = 0
+
+    def update(self, r):
+        out = 0
+        n = len(self.buf)
+        if n == self.window:
+            mean = self.s / n
+            var = max(0.0, (self.s2 - n * mean * mean) / (n - 1))
+            if self.quiet:
+                self.quiet -= 1
+            elif var > 0:
+                z = (r - mean) / math.sqrt(var)
+                if abs(z) > self.thresh:
+                    out = 1 if z > 0 else -1
+                    self.quiet = self.cooldown
+            old = self.buf.popleft()
+            self.s -= old
+            self.s2 -= old * old
+        self.buf.append(r)
+        self.s += r
+        self.s2 += r * r
+        return out
+
+    def detect(self, returns):
+        r = pd.Series(np.asarray(returns, dtype=float))
+        roll = r.rolling(self.window)
+        z = ((r - roll.mean().shift(1)) / roll.std().shift(1)).to_numpy()
+        cand = np.flatnonzero(np.abs(np.nan_to_num(z)) > self.thresh)
+        out = np.zeros(len(r), dtype=np.int8)
+        next_ok = 0
+        for i in cand:  # cooldown only ever touches the (few) candidates
+            if i >= next_ok:
+                out[i] = 1 if z[i] > 0 else -1
+                next_ok = i + self.cooldown + 1
+        return out
+
+
+class BOCPD(Detector):
+    # Gaussian observations of x = r / sigma_prior with unit variance and unknown mean
+    # (Normal prior N(0, prior_var)), constant hazard, run length truncated at max_run.
+    # Alarm on the rising edge of P(run length < short) > p_alarm; the sign is that of
+    # the posterior mean of the short runs.
+    def __init__(self, hazard=1 / 250, prior_var=4.0, max_run=300, short=5, p_alarm=0.5,
+                 halflife=100, warmup=30):
+        self.hazard, self.prior_var, self.max_run = hazard, prior_var, max_run
+        self.short, self.p_alarm = short, p_alarm
+        self.halflife, self.warmup = halflife, warmup
+        self.scale = VolScale(halflife, warmup)
+        self.reset()
+
+    def reset(self):
+        self.scale.reset()
+        self.logP = np.zeros(1)   # log run-length posterior
+        self.n = np.zeros(1)      # observations per run length
+        self.s = np.zeros(1)      # sum of x per run length
+        self.armed = True
+
+    def update(self, r):
+        sigma = self.scale.update(r)
+        if not sigma:
+            return 0
+        x = r / sigma
+        v = 1.0 / (1.0 / self.prior_var + self.n)
+        m = v * self.s
+        pv = v + 1.0
+        # in logs: a jump of many sigmas underflows the predictive of every run length
+        joint = self.logP - 0.5 * ((x - m) ** 2 / pv + np.log(2 * np.pi * pv))
+        cp = _logsumexp(joint) + math.log(self.hazard)
+        logP = np.concatenate(([cp], joint + math.log1p(-self.hazard)))
+        n = np.concatenate(([0.0], self.n + 1))
+        s = np.concatenate(([0.0], self.s + x))
+        if len(logP) > self.max_run:  # fold the tail into the longest kept run length
+            logP[self.max_run - 1] = np.logaddexp(logP[self.max_run - 1], logP[self.max_run])
+            logP, n, s = logP[:self.max_run], n[:self.max_run], s[:self.max_run]
+        self.logP, self.n, self.s = logP - _logsumexp(logP), n, s
+
+        # run length 0 has seen nothing yet; "short" = 1..short observations
+        short = np.exp(self.logP[1:self.short + 1])
+        p_short = short.sum()
+        if p_short > self.p_alarm:
+            if self.armed:
+                self.armed = False
+                mean = (short * self.s[1:self.short + 1] / self.n[1:self.short + 1]).sum()
+                return 1 if mean > 0 else -1
+        else:
+            self.armed = True
+        return 0
+
+    def detect(self, returns, chunk=256):
+        # Same recursion on fixed max_run-wide rows, only the first min(i + 1, max_run)
+        # entries live (as long as update()'s arrays, so the sums round the same). Per
+        # block of `chunk` returns, the run sums S[j, k] = S[j-1, k-1] + x[j-1] are built a
+        # column at a time and the predictive of every (return, run length) in one matrix
+        # op; only the posterior shift/normalise stays a per-return step. The alarm edges
+        # are found afterwards on the stored short-run rows.
+        r = np.asarray(returns, dtype=float)
+        out = np.zeros(len(r), dtype=np.int8)
+        sigma = prior_vol(r, self.halflife, self.warmup)
+        live = np.flatnonzero(~np.isnan(sigma))
+        x = r[live] / sigma[live]
+        M, K = self.max_run, self.short
+        log_h, log_stay = math.log(self.hazard), math.log1p(-self.hazard)
+        v = 1.0 / (1.0 / self.prior_var + np.arange(M, dtype=float))
+        pv = v + 1.0
+        log_norm = np.log(2 * np.pi * pv)
+        logP = np.full(M, -np.inf)
+        logP[0] = 0.0
+        s = np.zeros(M)
+        short_p = np.empty((len(x), K))
+        short_s = np.empty((len(x), K))
+        nxt = np.empty(M)
+        for c0 in range(0, len(x), chunk):
+            xc = x[c0:c0 + chunk]
+            L = len(xc)
+            S = np.empty((L + 1, M))  # row j: run sums before return j; row L carries over
+            S[0] = s
+            S[1:, 0] = 0.0
+            for k in range(1, M):
+                S[1:, k] = S[:-1, k - 1] + xc
+            pred = -0.5 * ((xc[:, None] - v * S[:L]) ** 2 / pv + log_norm)
+            for j in range(L):
+                n = min(c0 + j + 1, M)
+                joint = logP[:n] + pred[j, :n]
+                nxt[0] = _logsumexp(joint) + log_h
+                if n < M:
+                    nxt[1:n + 1] = joint + log_stay
+                    n += 1
+                else:
+                    nxt[1:] = joint[:-1] + log_stay
+                    nxt[M - 1] = np.logaddexp(nxt[M - 1], joint[M - 1] + log_stay)  # fold the tail
+                logP[:n] = nxt[:n] - _logsumexp(nxt[:n])
+                short_p[c0 + j] = logP[1:K + 1]
+            short_s[c0:c0 + L] = S[1:, 1:K + 1]
+            s = S[L]
+
+        p = np.exp(short_p)
+        above = p.sum(axis=1) > self.p_alarm
+        edge = above & ~np.concatenate(([False], above[:-1]))
+        mean = (p * short_s / np.arange(1, K + 1)).sum(axis=1)
+        out[live[edge]] = np.where(mean[edge] > 0, 1, -1)
+        return out
+
+
+DETECTORS = {
+    "cusum_fixed": FixedCUSUM,
+    "cusum_adaptive": AdaptiveCUSUM,
+    "page_hinkley": PageHinkley,
+    "rolling_z": RollingZ,
+    "bocpd": BOCPD,
+}
+
+
+def inject_jump(r, at, jump, ramp=5):
+    # add a total log move of log(1 + jump) spread evenly over `ramp` returns from `at`
+    r = np.array(r, dtype=float)
+    r[at:at + ramp] += np.log1p(jump) / ramp
+    return r
+
+
+def evaluate(detector, prices, jumps=(0.02, -0.02), trials=20, ramp=5, max_delay=60, seed=0):
+    # False alarms: alarms on the clean history (it has no labelled change), per 1000 returns.
+    # Delay: returns from the start of an injected jump to the first alarm in its direction,
+    # within max_delay; a jump with no such alarm counts as missed.
+    r = np.diff(np.log(np.asarray(prices, dtype=float)))
+    clean = detector.detect(r)
+    rng = np.random.default_rng(seed)
+    delays, missed = [], 0
+    for _ in range(trials):
+        for jump in jumps:
+            at = int(rng.integers(200, len(r) - max_delay - ramp))
+            alarms = detector.detect(inject_jump(r, at, jump, ramp))
+            want = 1 if jump > 0 else -1
+            hit = np.flatnonzero(alarms[at:at + max_delay] == want)
+            if len(hit):
+                delays.append(int(hit[0]))
+            else:
+                missed += 1
+    n = trials * len(jumps)
+    return {
+        "false_alarms_per_1k": 1000.0 * np.count_nonzero(clean) / max(1, len(r)),
+        "detection_rate": (n - missed) / n,
+        "mean_delay": float(np.mean(delays)) if delays else None,
+        "median_delay": float(np.median(delays)) if delays else None,
+    }
+
+
+if __name__ == '__main__':
+    from backtest import load_prices
+
+    prices = load_prices()
+    for jump in (0.01, 0.02, 0.05):
+        print(f"Injected jump {jump:+.0%} over 5 ticks:")
+        for name, cls in DETECTORS.items():
+            res = evaluate(cls(), prices, jumps=(jump, -jump))
+            delay = "-" if res["mean_delay"] is None else f"{res['mean_delay']:.1f}"
+            print(f"  {name:15} false alarms/1k {res['false_alarms_per_1k']:6.2f}  "
+                  f"detected {res['detection_rate']:5.0%}  mean delay {delay}")
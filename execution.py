@@ -0,0 +1,123 @@
+# execution.py
+# Splits a large order into child orders within the per-trade limit and sends them
+# concurrently (or one every min_interval seconds), collecting fills and failures.
+# OrderGateway nets the orders of one tick before they reach the Executor.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Executor:
+    def __init__(self, api, trade_gbp_limit=100000, max_workers=4, min_interval=0.0, min_qty=1.0):
+        self.api = api
+        self.trade_gbp_limit = trade_gbp_limit
+        self.max_workers = max_workers
+        self.min_interval = min_interval  # seconds between child submissions, 0 = all at once
+        self.min_qty = min_qty            # residual children smaller than this are dropped
+        self.pool = ThreadPoolExecutor(max_workers) if max_workers > 1 else None
+
+    def slices(self, qty, price):
+        # Full clips of trade_gbp_limit / price EUR, then the remainder
+        clip = self.trade_gbp_limit / price
+        n = int(qty // clip)
+        children = [clip] * n
+        rest = qty - n * clip
+        if rest >= self.min_qty:
+            children.append(rest)
+        return children
+
+    def _send(self, qty, side):
+        try:
+            return self.api.trade(qty, side)
+        except Exception:
+            return None
+
+    def execute(self, qty, side, price):
+        children = self.slices(qty, price)
+        if self.pool is not None and len(children) > 1:
+            futures = []
+            for i, q in enumerate(children):
+                if i and self.min_interval:
+                    time.sleep(self.min_interval)
+                futures.append(self.pool.submit(self._send, q, side))
+            results = [f.result() for f in futures]
+        else:
+            results = []
+            for i, q in enumerate(children):
+                if i and self.min_interval:
+                    time.sleep(self.min_interval)
+                results.append(self._send(q, side))
+
+        report = {"requested": qty, "side": side, "filled": 0.0, "avg_price": None,
+                  "fills": [], "failed": []}
+        notional = 0.0
+        for q, resp in zip(children, results):
+            if not resp:
+                report["failed"].append(q)
+                continue
+            px = float(resp.get("price", price))
+            report["fills"].append((q, px))
+            report["filled"] += q
+            notional += q * px
+        if report["filled"] > 0:
+            report["avg_price"] = notional / report["filled"]
+        return report
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+class OrderGateway:
+    # Collects the orders (intents) of one tick and sends only their net:
+    # opposite intents cross internally at their quote, the residual goes out through an
+    # Executor (sliced at trade_gbp_limit) unless it is below min_qty.
+    # flush() returns, per intent in submission order, (qty, side, quote, filled, avg_px):
+    # intents against the net fill in full at the quote; intents on the net side cross the
+    # same volume at the quote and share the external fill pro rata.
+    def __init__(self, api, trade_gbp_limit=100000, min_qty=1.0, max_workers=4):
+        self.executor = Executor(api, trade_gbp_limit, max_workers=max_workers, min_qty=min_qty)
+        self.min_qty = min_qty
+        self.pending = []
+        self.intents = 0     # orders submitted
+        self.sent = 0        # trade calls made for them
+        self.crossed = 0.0   # EUR matched internally instead of traded
+
+    def submit(self, qty, side, quote=None):
+        self.pending.append((qty, side, quote))
+        return len(self.pending) - 1
+
+    def flush(self, price):
+        orders, self.pending = self.pending, []
+        if not orders:
+            return []
+        self.intents += len(orders)
+        buys = sum(q for q, s, _ in orders if s == "buy")
+        sells = sum(q for q, s, _ in orders if s == "sell")
+        net = buys - sells
+        side = "buy" if net > 0 else "sell"
+        report = None
+        if abs(net) >= self.min_qty:
+            report = self.executor.execute(abs(net), side, price)
+            self.sent += len(report["fills"]) + len(report["failed"])
+
+        crossed = min(buys, sells)
+        self.crossed += crossed
+        net_side_total = max(buys, sells)
+        ext_filled = report["filled"] if report else 0.0  # a sub-min_qty residual is not sent
+        ext_px = report["avg_price"] if report and report["avg_price"] else price
+        fills = []
+        for q, o_side, quote in orders:
+            quote = quote if quote is not None else price
+            if o_side != side:
+                fills.append((q, o_side, quote, q, quote))
+                continue
+            w = q / net_side_total
+            cross_q, ext_q = w * crossed, w * ext_filled
+            filled = cross_q + ext_q
+            px = (cross_q * quote + ext_q * ext_px) / filled if filled > 0 else quote
+            fills.append((q, o_side, quote, filled, px))
+        return fills
+
+    def close(self):
+        self.executor.close()
@@ -0,0 +1,299 @@
+# features.py
+# Fixed-size feature vector of the signal inputs of strag.Strategy, plus lags and extra
+# rolling windows, for offline research and live logging:
+#   compute(prices)       -> (n, len(names)) array over a whole price series, in one pass
+#   FeatureStream.update  -> the same row for one live tick, written into a preallocated
+#                            vector (ring buffers, no per-tick allocation)
+# Row i is the state after price i, exactly as Strategy sees it after Stats.update();
+# both paths agree to float rounding. `ready` marks rows past the Strategy warm-up.
+# Strategy.feature_stream = FeatureStream.for_strategy(strat) logs the live rows as
+# telemetry 'features' events; the stream takes over the strategy's Stats/CUSUM state
+# (seed_from), again after every Strategy.warm_start() or restore().
+#
+#   python features.py --prices EURGBP_ticks.bin --out features.npz
+
+import argparse
+import math
+
+import numpy as np
+
+LAGS = (1, 2, 3)
+MOM_WINDOWS = (5, 20)
+SHORT_VOL = 10
+
+
+def feature_names(lags=LAGS, mom_windows=MOM_WINDOWS, short_vol=SHORT_VOL):
+    return (["r"] + [f"r_lag{k}" for k in lags]
+            + ["ema", "sigma_r", "z", "dist_high", "dist_low", "cus_pos", "cus_neg", "cus"]
+            + [f"mom_{w}" for w in mom_windows] + [f"vol_{short_vol}"])
+
+
+def _params(strat):
+    # windows and CUSUM settings of a Strategy
+    st, cu = strat.stats, strat.cusum
+    return dict(ema_len=st.ema_len, vol_len=st.returns.maxlen, breakout_len=st.breakout_len,
+                k_mult=getattr(cu, "k_mult", 0.2), h_mult=getattr(cu, "h_mult", 3.0),
+                warmup=strat.warmup)
+
+
+def compute(prices, ema_len=30, vol_len=40, breakout_len=20, k_mult=0.2, h_mult=3.0,
+            warmup=30, lags=LAGS, mom_windows=MOM_WINDOWS, short_vol=SHORT_VOL):
+    # -> (X, names, ready)
+    import pandas as pd
+    from backtest import features
+    from detectors import lindley
+
+    p = np.asarray(prices, dtype=float)
+    n = len(p)
+    f = features(p, ema_len, vol_len, breakout_len)
+    r, ema, sigma = f["r"], f["ema"], f["sigma_r"]
+    ready = f["n_returns"] >= warmup
+
+    cols = [r]
+    for k in lags:
+        lag = np.zeros(n)
+        lag[k:] = r[:n - k] if k < n else 0.0
+        cols.append(lag)
+    sigma_p = p * sigma
+    z = np.divide(p - ema, sigma_p, out=np.zeros(n), where=sigma_p != 0)
+    cols += [ema, sigma, z, np.log(p / f["high"]), np.log(p / f["low"])]
+
+    # CUSUM as in Strategy.signals(): runs from the first ready tick, k and h set from
+    # the first non-zero sigma_r there and then frozen
+    pos, neg, cus = np.zeros(n), np.zeros(n), np.zeros(n)
+    start = int(np.argmax(ready)) if ready.any() else n
+    if start < n:
+        live = sigma[start:] != 0
+        first = int(np.argmax(live)) if live.any() else n - start
+        s0 = sigma[start + first] if first < n - start else 0.0
+        k = np.zeros(n - start)
+        k[first:] = k_mult * s0
+        h = np.zeros(n - start)
+        h[first:] = h_mult * s0
+        x = r[start:]
+        up_s, up = lindley(x - k, h)
+        dn_s, dn = lindley(-x - k, h)
+        pos[start:], neg[start:] = up_s, -dn_s
+        cus[start + np.asarray(dn, dtype=int)] = -1
+        cus[start + np.asarray(up, dtype=int)] = 1
+    cols += [pos, neg, cus]
+
+    lp = np.log(p)
+    for w in mom_windows:
+        cols.append(lp - lp[np.maximum(np.arange(n) - w, 0)])
+    vol = np.zeros(n)
+    if n > 1:
+        std = pd.Series(r[1:]).rolling(short_vol, min_periods=2).std().to_numpy()
+        vol[1:] = np.nan_to_num(std, nan=0.0)
+    cols.append(vol)
+    names = feature_names(lags, mom_windows, short_vol)
+    return np.column_stack(cols) if n else np.zeros((0, len(names))), names, ready
+
+
+def compute_for(strat, prices):
+    return compute(prices, **_params(strat))
+
+
+class _RollingStd:
+    # std (ddof=1) of the last `size` samples, sliding Welford sums as in strag.Stats
+    def __init__(self, size):
+        self.buf = np.zeros(size)
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.i = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def load(self, samples, mean, m2):
+        # take over a window and its running sums (e.g. strag.Stats.returns, _mean, _m2)
+        samples = list(samples)[-self.size:]
+        self.buf[:len(samples)] = samples
+        self.n = len(samples)
+        self.i = self.n % self.size
+        self.mean, self.m2 = mean, m2
+
+    def push(self, x):
+        if self.n == self.size:
+            old = float(self.buf[self.i])
+            n = self.n
+            if n == 1:
+                self.mean, self.m2 = 0.0, 0.0
+            else:
+                mean = (n * self.mean - old) / (n - 1)
+                self.m2 -= (old - self.mean) * (old - mean)
+                self.mean = mean
+            self.n -= 1
+        self.buf[self.i] = x
+        self.i = (self.i + 1) % self.size
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 = max(0.0, self.m2 + d * (x - self.mean))
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n >= 2 else 0.0
+
+
+class _MonoQueue:
+    # Sliding max (sign=1) or min (sign=-1) over the last `size` values, in fixed arrays
+    def __init__(self, size, sign):
+        self.idx = np.zeros(size + 2, dtype=np.int64)  # one slot more than can be held
+        self.val = np.zeros(size + 2)
+        self.cap = size + 2
+        self.size = size
+        self.sign = sign
+        self.head = self.tail = 0  # entries live in [head, tail) modulo cap
+
+    def load(self, entries):
+        # (i, value) pairs already monotonic, oldest first (strag.Stats._maxq / _minq)
+        self.head = self.tail = 0
+        for i, x in entries:
+            self.idx[self.tail] = i
+            self.val[self.tail] = x
+            self.tail += 1
+
+    def push(self, i, x):
+        s, cap = self.sign, self.cap
+        while self.tail != self.head and s * self.val[(self.tail - 1) % cap] <= s * x:
+            self.tail = (self.tail - 1) % cap
+        self.idx[self.tail] = i
+        self.val[self.tail] = x
+        self.tail = (self.tail + 1) % cap
+        if self.idx[self.head] <= i - self.size:
+            self.head = (self.head + 1) % cap
+        return float(self.val[self.head])
+
+
+class FeatureStream:
+    def __init__(self, ema_len=30, vol_len=40, breakout_len=20, k_mult=0.2, h_mult=3.0,
+                 warmup=30, lags=LAGS, mom_windows=MOM_WINDOWS, short_vol=SHORT_VOL):
+        self.names = feature_names(lags, mom_windows, short_vol)
+        self.vec = np.zeros(len(self.names))  # updated in place every tick
+        self.alpha = 2 / (ema_len + 1)
+        self.k_mult, self.h_mult, self.warmup = k_mult, h_mult, warmup
+        self.vol_len = vol_len
+        self.lags = np.asarray(lags, dtype=np.int64)
+        self.mom_windows = np.asarray(mom_windows, dtype=np.int64)
+        self._r = np.zeros(int(max(lags, default=0)) + 1)            # recent returns, ring
+        self._lp = np.zeros(int(max(mom_windows, default=0)) + 1)    # recent log prices, ring
+        self._sigma = _RollingStd(vol_len)
+        self._vol = _RollingStd(short_vol)
+        self._max = _MonoQueue(breakout_len, 1)
+        self._min = _MonoQueue(breakout_len, -1)
+        self.n = 0
+        self.last = None
+        self.ema = None
+        self.k = self.h = 0.0
+        self.pos = self.neg = 0.0
+
+    @classmethod
+    def for_strategy(cls, strat, **kw):
+        fs = cls(**_params(strat), **kw)
+        if strat.stats.prices:
+            fs.seed_from(strat)
+        return fs
+
+    def seed_from(self, strat):
+        # Continue from the strategy's current state (after warm_start / restore), so the
+        # next row is the one its signals() sees. The CUSUM columns follow strag.CUSUM only.
+        from strag import CUSUM
+        st = strat.stats
+        n = st._n
+        rets, prices = list(st.returns), list(st.prices)
+        self.n = n
+        self.last = prices[-1] if prices else None
+        self.ema = st.ema
+        self._sigma.load(rets, st._mean, st._m2)
+        self._vol.reset()
+        for r in rets[-self._vol.size:]:
+            self._vol.push(r)
+        self._max.load(st._maxq)
+        self._min.load(st._minq)
+        # rings hold tick i at slot i % len; tick 0 has no return
+        rb, lb = self._r, self._lp
+        for i in range(max(0, n - len(rb)), n):
+            back = n - 1 - i
+            rb[i % len(rb)] = rets[-1 - back] if back < len(rets) and i > 0 else 0.0
+        for i in range(max(0, n - len(lb), n - len(prices)), n):
+            lb[i % len(lb)] = math.log(prices[i - n])
+        cu = strat.cusum
+        if isinstance(cu, CUSUM):
+            self.k, self.h, self.pos, self.neg = cu.k, cu.h, cu.pos, cu.neg
+        else:
+            self.k = self.h = 0.0
+            self.pos = self.neg = 0.0
+
+    @property
+    def ready(self):
+        return min(self.n - 1, self.vol_len) >= self.warmup
+
+    def update(self, p):
+        i = self.n
+        self.n += 1
+        r = math.log(p / self.last) if self.last is not None else 0.0
+        if self.last is not None:
+            self._sigma.push(r)
+            self._vol.push(r)
+        self.last = p
+        self.ema = p if self.ema is None else self.alpha * p + (1 - self.alpha) * self.ema
+        high = self._max.push(i, p)
+        low = self._min.push(i, p)
+        sigma = self._sigma.std()
+
+        cus = 0
+        if self.ready:
+            if self.h == 0.0:
+                self.k, self.h = self.k_mult * sigma, self.h_mult * sigma
+            self.pos = max(0.0, self.pos + r - self.k)
+            self.neg = min(0.0, self.neg + r + self.k)
+            up, down = self.pos > self.h, self.neg < -self.h
+            if up: self.pos = 0.0
+            if down: self.neg = 0.0
+            cus = 1 if up else (-1 if down else 0)
+
+        v, rb, lb = self.vec, self._r, self._lp
+        rb[i % len(rb)] = r
+        lp = math.log(p)
+        lb[i % len(lb)] = lp
+        v[0] = r
+        j = 1
+        for k in self.lags:
+            v[j] = rb[(i - k) % len(rb)] if i >= k else 0.0
+            j += 1
+        sigma_p = p * sigma
+        v[j] = self.ema
+        v[j + 1] = sigma
+        v[j + 2] = (p - self.ema) / sigma_p if sigma_p != 0 else 0.0
+        v[j + 3] = math.log(p / high)
+        v[j + 4] = math.log(p / low)
+        v[j + 5] = self.pos
+        v[j + 6] = self.neg
+        v[j + 7] = cus
+        j += 8
+        for w in self.mom_windows:
+            v[j] = lp - lb[(i - w) % len(lb) if i >= w else 0]
+            j += 1
+        v[j] = self._vol.std()
+        return v
+
+
+if __name__ == '__main__':
+    import time
+    from backtest import load_prices
+    from strag import Strategy
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prices", default="EURGBP_price_history.csv",
+                        help="price CSV or TickStore .bin file")
+    parser.add_argument("--out", default="features.npz")
+    args = parser.parse_args()
+
+    prices = load_prices(args.prices)
+    t0 = time.perf_counter()
+    X, names, ready = compute_for(Strategy(api=object()), prices)
+    dt = time.perf_counter() - t0
+    np.savez(args.out, X=X, names=np.array(names), ready=ready, prices=prices)
+    print(f"{X.shape[0]} ticks x {X.shape[1]} features in {dt * 1000:.1f} ms -> {args.out}")
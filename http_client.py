@@ -0,0 +1,76 @@
+# http_client.py
+# Shared HTTP layer for the game server: one keep-alive requests.Session per base URL,
+# per-endpoint timeouts and bounded retry with exponential backoff.
+
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# seconds, keyed by the first path segment of the endpoint
+TIMEOUTS = {
+    "price": 2.0,
+    "trade": 3.0,
+    "positions": 3.0,
+    "priceHistory": 10.0,
+    "normalizedCapitals": 3.0,
+    "tradeHistory": 5.0,
+}
+DEFAULT_TIMEOUT = 5.0
+
+
+def _not_sent(e):
+    # True when the request never reached the server (connect refused / timed out).
+    # "Connection aborted" and friends come after the request was written: not safe.
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", e.args[0]) if e.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class Client:
+    def __init__(self, base_url, timeouts=None, retries=2, backoff=0.1, pool_size=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = dict(TIMEOUTS, **(timeouts or {}))
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def timeout(self, path):
+        return self.timeouts.get(path.strip("/").split("/")[0], DEFAULT_TIMEOUT)
+
+    def request(self, method, path, idempotent=True, retries=None, **kwargs):
+        # GETs are retried on any connection error, timeout or 5xx. A POST is only retried
+        # when the connection was never made: a read timeout may mean the order went through.
+        retries = self.retries if retries is None else retries
+        url = self.base_url + "/" + path.lstrip("/")
+        kwargs.setdefault("timeout", self.timeout(path))
+        for attempt in range(retries + 1):
+            try:
+                res = self.session.request(method, url, **kwargs)
+                if not (idempotent and res.status_code >= 500 and attempt < retries):
+                    return res
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries or not (idempotent or _not_sent(e)):
+                    raise
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, idempotent=False, **kwargs)
+
+
+_clients = {}
+
+
+def get_client(base_url):
+    # One pooled client per server, shared by every caller in the process
+    key = base_url.rstrip("/")
+    if key not in _clients:
+        _clients[key] = Client(key)
+    return _clients[key]
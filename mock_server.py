@@ -0,0 +1,182 @@
+# mock_server.py
+# Local stand-in for the FX game server, for load tests and deterministic integration runs.
+# Serves the same endpoints as the live game, replaying EURGBP_price_history.csv (or a
+# synthetic path with a regime shift) at `speed` ticks per second, with optional
+# latency, hanging requests and rejected trades.
+#
+#   python mock_server.py --speed 100 --latency 0.02 --reject-rate 0.05
+#   FX_URL=http://127.0.0.1:8000 python run_strat.py
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_path(n=2200, p0=0.87, sigma=2e-4, shift_at=1500, jump=0.10, seed=0):
+    # Gaussian random walk in log price with one jump of `jump` (Brexit-style) at shift_at
+    rng = np.random.default_rng(seed)
+    r = rng.normal(0.0, sigma, n)
+    r[0] = 0.0
+    if 0 < shift_at < n:
+        r[shift_at] += np.log1p(jump)
+    return p0 * np.exp(np.cumsum(r))
+
+
+class Game:
+    def __init__(self, prices, speed=1.0, eur0=0.0, gbp0=1_000_000.0, max_trade_gbp=None,
+                 reject_rate=0.0, start_time=None, seed=None, pair="EURGBP"):
+        self.pair = pair
+        self.base, self.quote_ccy = pair[:3], pair[3:]
+        self.prices = np.asarray(prices, dtype=float)
+        self.speed = speed                  # ticks per wall-clock second
+        self.eur0, self.gbp0 = eur0, gbp0   # holdings of a trader on first contact
+        self.max_trade_gbp = max_trade_gbp
+        self.reject_rate = reject_rate
+        self.t0 = time.monotonic()
+        self.start_time = float(start_time if start_time is not None else int(time.time()))
+        self.positions = {}
+        self.trades = []
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def index(self):
+        return min(int((time.monotonic() - self.t0) * self.speed), len(self.prices) - 1)
+
+    def quote(self):
+        i = self.index()
+        return float(self.prices[i]), self.start_time + i
+
+    def history(self):
+        i = self.index()
+        return {str(int(self.start_time + k)): float(p) for k, p in enumerate(self.prices[:i + 1])}
+
+    def book(self, trader_id):
+        if trader_id not in self.positions:
+            self.positions[trader_id] = {self.base: self.eur0, self.quote_ccy: self.gbp0}
+        return self.positions[trader_id]
+
+    def trade(self, trader_id, qty, side):
+        price, t = self.quote()
+        try:
+            qty = float(qty)
+        except (TypeError, ValueError):
+            return {"success": False}
+        if qty <= 0 or side not in ("buy", "sell") or not trader_id:
+            return {"success": False}
+        if self.max_trade_gbp is not None and qty * price > self.max_trade_gbp:
+            return {"success": False}
+        with self.lock:
+            if self.rng.random() < self.reject_rate:
+                return {"success": False}
+            pos = self.book(trader_id)
+            sign = 1 if side == "buy" else -1
+            pos[self.base] += sign * qty
+            pos[self.quote_ccy] -= sign * qty * price
+            self.trades.append({"time": t, "User_name": trader_id, "side": side,
+                                "quantity": qty, "pair": self.pair, "rate": price})
+        return {"success": True, "price": price, "time": t, "quantity": qty, "side": side}
+
+    def normalized_capitals(self):
+        price, _ = self.quote()
+        with self.lock:
+            return {k: v[self.quote_ccy] + price * v[self.base] for k, v in self.positions.items()}
+
+
+def make_handler(game, latency=0.0, jitter=0.0, timeout_rate=0.0, hang=30.0):
+    rng = random.Random()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real server behind its proxy
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def _delay(self):
+            if timeout_rate and rng.random() < timeout_rate:
+                time.sleep(hang)  # longer than any client timeout
+            elif latency or jitter:
+                time.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+
+        def _reply(self, obj, code=200):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._delay()
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            if parts == ["price", game.pair]:
+                price, t = game.quote()
+                return self._reply({"price": price, "time": t})
+            if parts == ["priceHistory", game.pair]:
+                return self._reply(game.history())
+            if len(parts) == 2 and parts[0] == "positions":
+                with game.lock:
+                    return self._reply(dict(game.book(parts[1])))
+            if parts == ["normalizedCapitals"]:
+                return self._reply(game.normalized_capitals())
+            if parts == ["tradeHistory"]:
+                with game.lock:
+                    return self._reply(list(game.trades))
+            self._reply({"error": "not found"}, 404)
+
+        def do_POST(self):
+            self._delay()
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                data = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._reply({"error": "bad json"}, 400)
+            if parts == ["trade", game.pair]:
+                return self._reply(game.trade(data.get("trader_id"), data.get("quantity"), data.get("side")))
+            self._reply({"error": "not found"}, 404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(game, host="127.0.0.1", port=0, **faults):
+    # Serve in a daemon thread; returns (server, base_url). Port 0 picks a free port.
+    server = ThreadingHTTPServer((host, port), make_handler(game, **faults))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--csv", default="EURGBP_price_history.csv")
+    parser.add_argument("--synthetic", action="store_true", help="random walk with a +10%% jump instead of --csv")
+    parser.add_argument("--speed", type=float, default=1.0, help="ticks per second (1 = real time)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of uniform noise on latency")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of trades rejected")
+    parser.add_argument("--max-trade-gbp", type=float, default=None)
+    parser.add_argument("--pair", default="EURGBP")
+    args = parser.parse_args()
+
+    prices = synthetic_path() if args.synthetic else pd.read_csv(args.csv)["price"].to_numpy()
+    game = Game(prices, speed=args.speed, max_trade_gbp=args.max_trade_gbp, reject_rate=args.reject_rate,
+                pair=args.pair)
+    server, url = start_server(game, args.host, args.port, latency=args.latency,
+                               jitter=args.jitter, timeout_rate=args.timeout_rate)
+    print(f"Mock FX game on {url}: {len(prices)} ticks at {args.speed}x")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\nStopped.")
@@ -0,0 +1,219 @@
+# multi_runner.py
+# Runs N Strategy variants on one price feed and one trader account.
+# - every new /price tick (pricefeed.PriceFeed, once each) is fanned out to every strategy
+# - each strategy trades against its own SubAccount (an equal slice of the account)
+# - the orders of one tick are netted: only the residual goes to API_MS.trade,
+#   opposite orders are crossed internally at the quote
+# - strategies run in-process, or each in a worker process for CPU isolation
+#
+#   python multi_runner.py                     # three example variants, in-process
+#   python multi_runner.py --processes
+
+import argparse
+import multiprocessing as mp
+from functools import partial
+
+from algo import API_MS
+from execution import OrderGateway
+from pricefeed import PriceFeed
+
+
+class SubAccount:
+    # What a Strategy sees as its API inside MultiRunner: its slice of the shared account.
+    # Orders are deferred and executed by the runner, so trade() is never reached.
+    def __init__(self, eur, gbp):
+        self.eur = float(eur)
+        self.gbp = float(gbp)
+        self.trades = 0
+
+    def get_positions(self):
+        return {"EUR": self.eur, "GBP": self.gbp}
+
+    def trade(self, qty, side):
+        return None
+
+    def apply(self, qty, side, px):
+        sign = 1 if side == "buy" else -1
+        self.eur += sign * qty
+        self.gbp -= sign * qty * px
+        self.trades += 1
+
+    def value(self, price):
+        return self.gbp + price * self.eur
+
+
+def _attach(strat, sub, warm_prices, share=1.0):
+    # share: this strategy's fraction of the account; its caps shrink with it, so N
+    # variants together stay within what one Strategy may hold on the whole account
+    strat.api = sub
+    strat.defer_orders = True
+    strat.max_normal *= share
+    strat.max_event *= share
+    strat.trade_gbp_limit *= share
+    if strat.risk is not None:
+        strat.risk.max_position_gbp *= share
+        if strat.risk.max_order_gbp is not None:
+            strat.risk.max_order_gbp *= share
+    if warm_prices is not None:
+        strat.warm_start(warm_prices)
+
+
+def _settle(strat, sub, fills):
+    # fills: OrderGateway.flush() rows for the orders this strategy sent last tick
+    for qty, side, quote, filled, px in fills:
+        strat.settle_fill(qty, side, quote, filled, px)
+        if filled > 0:
+            sub.apply(filled, side, px)
+
+
+class _LocalSlot:
+    def __init__(self, strat, eur, gbp, warm_prices, share=1.0):
+        if not hasattr(strat, "on_tick"):
+            strat = strat()  # factory
+        self.strat = strat
+        self.sub = SubAccount(eur, gbp)
+        _attach(strat, self.sub, warm_prices, share)
+
+    def send_tick(self, price):
+        self.strat.on_tick(price)
+
+    def orders(self):
+        orders, self.strat.orders = self.strat.orders, []
+        return orders
+
+    def settle(self, fills):
+        _settle(self.strat, self.sub, fills)
+
+    def positions(self):
+        return self.sub.eur, self.sub.gbp, self.sub.trades
+
+    def close(self):
+        pass
+
+
+def _worker(conn, factory, eur, gbp, warm_prices, share):
+    slot = _LocalSlot(factory, eur, gbp, warm_prices, share)
+    while True:
+        cmd, arg = conn.recv()
+        if cmd == "tick":
+            slot.send_tick(arg)
+            conn.send(slot.orders())
+        elif cmd == "fills":
+            slot.settle(arg)
+        elif cmd == "positions":
+            conn.send(slot.positions())
+        else:
+            return
+
+
+class _ProcessSlot:
+    def __init__(self, factory, eur, gbp, warm_prices, share=1.0):
+        self.conn, child = mp.Pipe()
+        self.proc = mp.Process(target=_worker, args=(child, factory, eur, gbp, warm_prices, share),
+                               daemon=True)
+        self.proc.start()
+
+    def send_tick(self, price):
+        self.conn.send(("tick", price))  # all workers tick in parallel, orders() collects
+
+    def orders(self):
+        return self.conn.recv()
+
+    def settle(self, fills):
+        self.conn.send(("fills", fills))
+
+    def positions(self):
+        self.conn.send(("positions", None))
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.send(("stop", None))
+        self.proc.join(timeout=5)
+
+
+class MultiRunner:
+    def __init__(self, strategies, api=None, processes=False, warm_start=True,
+                 reconcile_every=30, min_qty=1.0):
+        # strategies: Strategy instances or zero-arg factories (factories must be picklable
+        # with processes=True)
+        self.api = api if api is not None else API_MS()
+        self.gateway = OrderGateway(self.api, min_qty=min_qty)
+        self.reconcile_every = reconcile_every
+        self.ticks = 0
+        self.feed = None
+        inv = self.api.get_positions()
+        n = len(strategies)
+        eur, gbp = float(inv["EUR"]) / n, float(inv["GBP"]) / n
+        warm = self.api.history_arrays()[1] if warm_start else None
+        slot = _ProcessSlot if processes else _LocalSlot
+        self.slots = [slot(s, eur, gbp, warm, 1 / n) for s in strategies]
+
+    @property
+    def trade_calls(self):
+        return self.gateway.sent
+
+    @property
+    def orders_in(self):
+        return self.gateway.intents
+
+    def tick(self, price):
+        for s in self.slots:
+            s.send_tick(price)
+        per_slot = [s.orders() for s in self.slots]
+        if not any(per_slot):
+            return
+        # one netted order for all strategies; fills come back per order, in order
+        for orders in per_slot:
+            for q, side, quote in orders:
+                self.gateway.submit(q, side, quote)
+        fills = self.gateway.flush(price)
+        i = 0
+        for s, orders in zip(self.slots, per_slot):
+            s.settle(fills[i:i + len(orders)])
+            i += len(orders)
+
+    def check_account(self):
+        # Compare the server account with what the sub-accounts say we hold in total
+        inv = self.api.get_positions()
+        held = [s.positions() for s in self.slots]
+        d_eur = float(inv["EUR"]) - sum(p[0] for p in held)
+        d_gbp = float(inv["GBP"]) - sum(p[1] for p in held)
+        if abs(d_eur) > 1.0 or abs(d_gbp) > 1.0:
+            print(f"WARNING account drift vs sub-accounts: EUR {d_eur:+,.2f}, GBP {d_gbp:+,.2f}")
+        return d_eur, d_gbp
+
+    def report(self, price):
+        # Live comparison of the variants on the same ticks
+        return [{"eur": eur, "gbp": gbp, "value": gbp + price * eur, "trades": trades}
+                for eur, gbp, trades in (s.positions() for s in self.slots)]
+
+    def run(self, period=1.0, max_ticks=None, feed=None):
+        # max_ticks counts server ticks, not polls
+        print(f"Starting {len(self.slots)} strategies on one feed...")
+        self.feed = feed if feed is not None else PriceFeed(self.api, period=period)
+        try:
+            for data in self.feed.ticks(max_ticks):
+                self.tick(float(data["price"]))
+                self.ticks += 1
+                if self.reconcile_every and self.ticks % self.reconcile_every == 0:
+                    self.check_account()
+        finally:
+            for s in self.slots:
+                s.close()
+
+
+if __name__ == '__main__':
+    from sweep import make_strategy
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", action="store_true", help="one worker process per strategy")
+    parser.add_argument("--period", type=float, default=1.0)
+    args = parser.parse_args()
+
+    variants = [
+        partial(make_strategy, {}),                                    # baseline
+        partial(make_strategy, {"z_entry": 1e9, "h_mult": 1e9}),       # mean reversion only
+        partial(make_strategy, {"z_band": 1e9, "trail_pct": 0.004}),   # breakout only
+    ]
+    runner = MultiRunner(variants, processes=args.processes)
+    runner.run(period=args.period)
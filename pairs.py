@@ -0,0 +1,218 @@
+# pairs.py
+# Trading several currency pairs from one loop.
+# PairStats keeps the rolling state of strag.Stats + strag.CUSUM for N pairs as
+# structure-of-arrays NumPy buffers (one row per pair), so a tick updates every pair's
+# returns window, EMA, breakout high/low and CUSUM in one vectorized step. The decisions
+# stay in Strategy.act(), one Strategy per pair, fed the precomputed signals as in
+# backtest.py.
+#
+#   python pairs.py EURGBP EURUSD GBPUSD --period 1
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pricefeed import PriceFeed
+from strag import Strategy
+
+
+class PairStats:
+    def __init__(self, n, vol_len=40, breakout_len=20, ema_len=30, k_mult=0.2, h_mult=3.0, warmup=30):
+        self.n = n
+        self.vol_len, self.breakout_len = vol_len, breakout_len
+        self.alpha = 2 / (ema_len + 1)
+        self.k_mult, self.h_mult, self.warmup = k_mult, h_mult, warmup
+        self.last = np.full(n, np.nan)              # previous price
+        self.ema = np.full(n, np.nan)
+        self.rets = np.zeros((n, vol_len))          # returns window, ring per row
+        self.r_head = np.zeros(n, dtype=np.int64)   # next slot to write
+        self.r_cnt = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)                     # running mean / M2 of the window (Welford)
+        self.m2 = np.zeros(n)
+        self.px = np.full((n, breakout_len), np.nan)  # breakout window of prices, ring per row
+        self.p_head = np.zeros(n, dtype=np.int64)
+        self.k = np.zeros(n)                        # CUSUM, thresholds frozen at first use
+        self.h = np.zeros(n)
+        self.pos = np.zeros(n)
+        self.neg = np.zeros(n)
+
+    @classmethod
+    def like(cls, strat, n):
+        st, cu = strat.stats, strat.cusum
+        return cls(n, vol_len=st.returns.maxlen, breakout_len=st.breakout_len, ema_len=st.ema_len,
+                   k_mult=cu.k_mult, h_mult=cu.h_mult, warmup=strat.warmup)
+
+    def vol(self):
+        cnt = self.r_cnt
+        out = np.zeros(self.n)
+        ok = cnt >= 2
+        out[ok] = np.sqrt(self.m2[ok] / (cnt[ok] - 1))
+        return out
+
+    def _push_returns(self, rows, r):
+        # sliding Welford update, same arithmetic as Stats._push_return, on the given rows
+        W = self.vol_len
+        cnt, mean, m2 = self.r_cnt[rows], self.mean[rows], self.m2[rows]
+        full = cnt == W
+        if full.any():
+            old = self.rets[rows, self.r_head[rows]]
+            n = cnt.astype(float)
+            one = full & (cnt == 1)
+            new_mean = np.where(full & ~one, (n * mean - old) / np.maximum(n - 1, 1), mean)
+            m2 = np.where(full & ~one, m2 - (old - mean) * (old - new_mean), m2)
+            mean = np.where(one, 0.0, new_mean)
+            m2 = np.where(one, 0.0, m2)
+            cnt = cnt - full
+        self.rets[rows, self.r_head[rows]] = r
+        self.r_head[rows] = (self.r_head[rows] + 1) % W
+        cnt = cnt + 1
+        d = r - mean
+        mean = mean + d / cnt
+        m2 = np.maximum(0.0, m2 + d * (r - mean))
+        self.r_cnt[rows], self.mean[rows], self.m2[rows] = cnt, mean, m2
+
+    def update(self, prices):
+        # prices: one per pair, NaN where a pair has no new tick (its state is left alone).
+        # -> (ready, sigma_r, ema, high, low, cus); only the `ready` rows are meaningful.
+        p = np.asarray(prices, dtype=float)
+        tick = ~np.isnan(p)
+        has_last = tick & ~np.isnan(self.last)
+        rows = np.flatnonzero(has_last)
+        r = np.zeros(self.n)
+        if len(rows):
+            r[rows] = np.log(p[rows] / self.last[rows])
+            self._push_returns(rows, r[rows])
+        self.last[tick] = p[tick]
+
+        first = tick & np.isnan(self.ema)
+        self.ema[first] = p[first]
+        more = tick & ~first
+        self.ema[more] = self.alpha * p[more] + (1 - self.alpha) * self.ema[more]
+
+        rows = np.flatnonzero(tick)
+        self.px[rows, self.p_head[rows]] = p[rows]
+        self.p_head[rows] = (self.p_head[rows] + 1) % self.breakout_len
+        high = np.full(self.n, np.nan)
+        low = np.full(self.n, np.nan)
+        if len(rows):
+            high[rows] = np.nanmax(self.px[rows], axis=1)
+            low[rows] = np.nanmin(self.px[rows], axis=1)
+
+        sigma = self.vol()
+        ready = tick & (self.r_cnt >= self.warmup)
+        cus = np.zeros(self.n, dtype=np.int8)
+        if ready.any():
+            unset = ready & (self.h == 0.0)
+            self.k[unset] = self.k_mult * sigma[unset]
+            self.h[unset] = self.h_mult * sigma[unset]
+            rr, k, h = r[ready], self.k[ready], self.h[ready]
+            pos = np.maximum(0.0, self.pos[ready] + rr - k)
+            neg = np.minimum(0.0, self.neg[ready] + rr + k)
+            up, down = pos > h, neg < -h
+            self.pos[ready] = np.where(up, 0.0, pos)
+            self.neg[ready] = np.where(down, 0.0, neg)
+            cus[ready] = np.where(up, 1, np.where(down, -1, 0))
+        return ready, sigma, self.ema.copy(), high, low, cus
+
+    def seed(self, histories):
+        # Replay per-pair price histories (different lengths allowed), aligned on their ends
+        T = max((len(h) for h in histories), default=0)
+        M = np.full((T, self.n), np.nan)
+        for j, h in enumerate(histories):
+            if len(h):
+                M[T - len(h):, j] = h
+        for row in M:
+            self.update(row)
+
+
+class PairRunner:
+    # One Strategy per pair on one account; prices polled concurrently, signals computed
+    # for all pairs at once, then each Strategy acts on its own pair. Fills are copied
+    # into the ledgers of the other pairs that hold the same currency.
+    def __init__(self, pairs, show_log=False, strategy_factory=None, warm_start=True):
+        factory = strategy_factory or (lambda pair: Strategy(show_log=show_log, pair=pair))
+        self.pairs = list(pairs)
+        self.strats = [factory(pair) for pair in self.pairs]
+        self.stats = PairStats.like(self.strats[0], len(self.pairs))
+        self.pool = ThreadPoolExecutor(max(1, min(16, len(self.pairs))))
+        self.ticks = 0
+        self.feeds = []
+        if warm_start:
+            hist = list(self.pool.map(self._history, self.strats))
+            self.stats.seed(hist)
+
+    @staticmethod
+    def _history(strat):
+        try:
+            return strat.api.history_arrays()[1]
+        except Exception as e:
+            print(f"{strat.pair}: no history ({e}), starting cold")
+            return np.empty(0)
+
+    @staticmethod
+    def _price(strat):
+        try:
+            data = strat.api.get_price()
+        except Exception:
+            return np.nan
+        return float(data["price"]) if data and data.get("price") else np.nan
+
+    def tick(self, prices=None):
+        # prices: one per pair, NaN for a pair without a new tick; polled here when None
+        if prices is None:
+            prices = np.fromiter(self.pool.map(self._price, self.strats), dtype=float, count=len(self.strats))
+        ready, sigma, ema, high, low, cus = self.stats.update(prices)
+        for i in np.flatnonzero(ready):
+            s = self.strats[i]
+            if s.sync_due():  # reconcile here, so the ledger before act() is the server's
+                s.reconcile()
+            before = (s.eur, s.gbp)
+            s.act(float(prices[i]), float(sigma[i]), float(ema[i]),
+                  float(high[i]), float(low[i]), int(cus[i]))
+            self._share_fills(s, before)
+        self.ticks += 1
+        return prices
+
+    def _share_fills(self, strat, before):
+        # One account: what strat's fills moved in its base/quote moves the same currency in
+        # every other pair's ledger (EURGBP and EURUSD both hold the EUR balance)
+        if before[0] is None or strat.eur is None:
+            return
+        delta = {strat.base: strat.eur - before[0], strat.quote: strat.gbp - before[1]}
+        for other in self.strats:
+            if other is strat or other.eur is None:
+                continue
+            other.eur += delta.get(other.base, 0.0)
+            other.gbp += delta.get(other.quote, 0.0)
+
+    def run(self, period=1.0, max_ticks=None):
+        # One pricefeed.PriceFeed per pair, each polled on its own schedule; a runner tick
+        # is a round of polls in which at least one pair has a new server tick
+        print(f"Starting {len(self.pairs)} pairs: {', '.join(self.pairs)}")
+        self.feeds = [PriceFeed(s.api, period=period, telemetry=s.telemetry) for s in self.strats]
+        for s, feed in zip(self.strats, self.feeds):
+            s.feed = feed
+        due = [0.0] * len(self.feeds)
+        while max_ticks is None or self.ticks < max_ticks:
+            now = time.monotonic()
+            polled = [i for i, t in enumerate(due) if t <= now]
+            prices = np.full(len(self.feeds), np.nan)
+            for i, data in zip(polled, self.pool.map(lambda i: self.feeds[i].poll(), polled)):
+                if data is not None:
+                    prices[i] = float(data["price"])
+            for i in polled:
+                due[i] = time.monotonic() + self.feeds[i].next_delay()
+            if not np.isnan(prices).all():
+                self.tick(prices)
+            time.sleep(max(0.0, min(due) - time.monotonic()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pairs", nargs="+", help="e.g. EURGBP EURUSD")
+    parser.add_argument("--period", type=float, default=1.0)
+    parser.add_argument("--cold", action="store_true", help="skip the /priceHistory warm start")
+    args = parser.parse_args()
+    PairRunner(args.pairs, show_log=True, warm_start=not args.cold).run(period=args.period)
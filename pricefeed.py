@@ -0,0 +1,142 @@
+# pricefeed.py
+# /price poller that hands every server tick to the strategy exactly once.
+# - de-duplicates on the server "time" field: a repeated or older time is not a new tick
+# - counts ticks missed between two polls (gap in server time) and flags a stale feed
+#   when no new tick has arrived for stale_after expected periods
+# - a server time more than reset_after steps back (or any step back while stale) is a
+#   restarted game: the feed starts over from it instead of dropping every later tick
+# - learns the server's tick period from arrival times and sleeps until just before the
+#   next tick is due, then polls every min_interval until it shows up
+# Without a "time" field (e.g. backtest.PaperBroker) every response is a tick and polls
+# run on a fixed `period` cadence, as the old loop did.
+#
+#   feed = PriceFeed(api, period=1.0)
+#   for data in feed.ticks():
+#       strat.on_price(data)
+
+import statistics
+import time
+from collections import deque
+
+from session import parse_time
+from telemetry import NullTelemetry
+
+
+class PriceFeed:
+    def __init__(self, api, period=1.0, min_interval=0.02, guard=0.1, stale_after=3.0,
+                 alpha=0.2, server_step=1.0, step_window=15, reset_after=3.0, telemetry=None,
+                 clock=time.monotonic):
+        self.api = api
+        self.period = period            # fixed cadence without server times, first guess otherwise
+        self.min_interval = min_interval
+        self.guard = guard              # start polling this fraction of a period early
+        self.stale_after = stale_after  # periods without a new tick before the feed is stale
+        self.alpha = alpha              # EWMA weight of the tick period estimate
+        self.telemetry = telemetry if telemetry is not None else NullTelemetry()
+        self.clock = clock
+        # server time between two ticks: 1 s in the game, then the median of the recent
+        # gaps, so one early or jittered time neither halves it nor counts missed ticks
+        self.server_step = self._step0 = server_step
+        self._gaps = deque(maxlen=step_window)
+        self.reset_after = reset_after  # server steps back in time that mean a new game
+        self.rate = None                # estimated local seconds per server time unit
+        self.last_time = None           # server time of the last tick handed out
+        self.last_seen = None           # local time that tick was first seen
+        self.last_poll = None
+        self.stale = False
+        self.counters = {"polls": 0, "ticks": 0, "duplicates": 0, "missed": 0, "errors": 0,
+                         "stale": 0, "late": 0, "resets": 0}
+
+    def poll(self):
+        # One GET /price -> the response if it carries a new tick, else None
+        now = self.clock()
+        self.last_poll = now
+        self.counters["polls"] += 1
+        try:
+            data = self.api.get_price()
+        except Exception:
+            data = None
+        if not data or not data.get("price"):
+            self.counters["errors"] += 1
+            return None
+        t = parse_time(data.get("time"))
+        if t is None:  # nothing to de-duplicate on
+            self.counters["ticks"] += 1
+            return data
+        if self.last_time is not None and t <= self.last_time:
+            back = self.last_time - t
+            if not (back > 0 and (self.stale or back > self.reset_after * self.server_step)):
+                self.counters["duplicates"] += 1
+                return None
+            self.reset()
+            self.counters["resets"] += 1
+            self.telemetry.event('feed', status='reset', time=t, back=back)
+
+        n = 1
+        if self.last_time is not None:
+            gap = t - self.last_time
+            n = max(1, round(gap / self.server_step))
+            if n > 1:
+                self.counters["missed"] += n - 1
+                self.telemetry.event('feed', status='missed', ticks=n - 1, time=t)
+            rate = (now - self.last_seen) / gap
+            self.rate = rate if self.rate is None else self.alpha * rate + (1 - self.alpha) * self.rate
+            self._gaps.append(gap)
+            if len(self._gaps) * 3 >= self._gaps.maxlen:
+                self.server_step = statistics.median(self._gaps)
+        if self.stale:
+            self.stale = False
+            self.telemetry.event('feed', status='resumed', time=t)
+        self.last_time, self.last_seen = t, now
+        self.counters["ticks"] += 1
+        return data
+
+    def reset(self):
+        # forget the server clock: the next response is a first tick again
+        self.last_time = self.last_seen = None
+        self.rate = None
+        self._gaps.clear()
+        self.server_step = self._step0
+        self.stale = False
+
+    @property
+    def tick_period(self):
+        # estimated local seconds between server ticks, None until two ticks were seen
+        if self.rate is None:
+            return None
+        return self.rate * self.server_step
+
+    def next_delay(self):
+        # Seconds to sleep before the next poll
+        now = self.clock()
+        if self.last_time is not None and self.tick_period is None:
+            return self.min_interval  # one tick seen: catch the next to learn the cadence
+        if self.last_time is None:
+            # fixed cadence from the previous poll
+            delay = self.last_poll + self.period - now if self.last_poll is not None else 0.0
+            if delay < 0:
+                self.counters["late"] += 1
+            return max(0.0, delay)
+        period = self.tick_period
+        due = self.last_seen + period
+        wait = due - self.guard * period - now
+        if wait > 0:
+            return wait
+        overdue = now - due
+        if overdue > self.stale_after * period:
+            if not self.stale:
+                self.stale = True
+                self.counters["stale"] += 1
+                self.telemetry.event('feed', status='stale', since=now - self.last_seen)
+            return min(period, max(self.min_interval, period / 4))  # back off while stale
+        return self.min_interval
+
+    def ticks(self, max_ticks=None, sleep=time.sleep):
+        # New ticks as they arrive; max_ticks counts ticks, not polls
+        n = 0
+        while max_ticks is None or n < max_ticks:
+            data = self.poll()
+            if data is not None:
+                n += 1
+                yield data
+            sleep(self.next_delay())
@@ -0,0 +1,102 @@
+# risk.py
+# Pre-trade checks between Strategy and the trade endpoint. Every check is O(1) on the
+# local ledger, so it runs on each order without a request:
+#   - drawdown   past max_drawdown of the peak value, only orders that move the EUR share
+#                toward neutral_share go through
+#   - rate       token bucket of max_orders_per_sec (a sliced order costs one per child
+#                and is cut to the children there are tokens for)
+#   - share      a sell may not take the EUR share below share_floor (the game's 30%)
+#   - position   |EUR notional| stays within max_position_gbp
+#   - order      one order is at most max_order_gbp
+# An order that breaks a limit is clipped to what the limit allows, or rejected when
+# that is below min_qty. check() returns the quantity and the reason.
+#
+#   strat = Strategy(risk=RiskEngine())
+#   strat.risk.counters  ->  Counter({'clip:share_floor': 12, 'reject:rate': 3, ...})
+
+import math
+import time
+from collections import Counter
+
+SHARE_FLOOR = 0.30
+
+
+class RiskEngine:
+    def __init__(self, share_floor=SHARE_FLOOR, max_position_gbp=800000, max_order_gbp=None,
+                 max_orders_per_sec=10.0, burst=None, max_drawdown=0.05, neutral_share=0.40,
+                 min_qty=1.0, clock=time.monotonic):
+        self.share_floor = share_floor
+        self.max_position_gbp = max_position_gbp
+        self.max_order_gbp = max_order_gbp
+        self.max_orders_per_sec = max_orders_per_sec
+        self.burst = burst if burst is not None else max(1.0, max_orders_per_sec)
+        self.max_drawdown = max_drawdown  # fraction of peak value, None = off
+        self.neutral_share = neutral_share
+        self.min_qty = min_qty
+        self.clock = clock                 # seconds; the backtest swaps in tick time
+        self.peak = None
+        self.value = None
+        self.halted = False
+        self._tokens = self.burst
+        self._last = None
+        self.counters = Counter()
+        self.last_reason = None
+
+    def mark(self, value):
+        # Portfolio value once per tick, for the drawdown check
+        self.value = value
+        if self.peak is None or value > self.peak:
+            self.peak = value
+        self.halted = (self.max_drawdown is not None and self.peak > 0
+                       and (self.peak - value) / self.peak > self.max_drawdown)
+
+    def _take(self, n):
+        now = self.clock()
+        if self._last is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.max_orders_per_sec)
+        self._last = now
+        n = min(n, int(self._tokens))  # orders that can go out now
+        self._tokens -= n
+        return n
+
+    def check(self, qty, side, price, eur, gbp, slice_gbp=None):
+        # -> (allowed EUR qty, reason); qty 0 means rejected, reason None means untouched.
+        # slice_gbp: the order goes out in child orders of that size (Strategy.send_sliced)
+        if not price or eur is None or gbp is None:
+            return self._out(0.0, "reject:no_state")
+        sign = 1.0 if side == "buy" else -1.0
+        V = gbp + price * eur
+        allowed, reason = qty, None
+
+        def clip(limit, name):
+            nonlocal allowed, reason
+            if limit < allowed:
+                allowed = max(0.0, limit)
+                reason = reason or name
+
+        if self.halted and V > 0:
+            # toward neutral_share only, without overshooting it
+            gap = (self.neutral_share * V / price - eur) * sign
+            clip(gap, "drawdown")
+        if self.share_floor is not None and sign < 0 and V > 0:
+            clip(eur - self.share_floor * V / price, "share_floor")
+        if self.max_position_gbp is not None:
+            clip(self.max_position_gbp / price - sign * eur, "position")
+        if self.max_order_gbp is not None:
+            clip(self.max_order_gbp / price, "order_size")
+        if allowed < self.min_qty:
+            return self._out(0.0, "reject:" + (reason or "min_qty"))
+        if self.max_orders_per_sec:
+            n_orders = math.ceil(allowed * price / slice_gbp) if slice_gbp else 1
+            n = self._take(n_orders)
+            if not n:
+                return self._out(0.0, "reject:rate")
+            if n < n_orders:  # a sliced order keeps the children there is room for
+                clip(n * slice_gbp / price, "rate")
+        return self._out(allowed, reason and "clip:" + reason)
+
+    def _out(self, qty, reason):
+        self.last_reason = reason
+        if reason:
+            self.counters[reason] += 1
+        return qty, reason
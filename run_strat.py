@@ -1,5 +1,54 @@
+import argparse
+from risk import RiskEngine
+from session import Session
 from strag import Strategy
+from telemetry import Telemetry
 
+parser = argparse.ArgumentParser()
+parser.add_argument("--async", dest="use_async", action="store_true",
+                    help="use the asyncio runner (concurrent requests, non-blocking trades)")
+parser.add_argument("--period", type=float, default=1.0,
+                    help="seconds between ticks (e.g. 0.01 against mock_server.py --speed 100)")
+parser.add_argument("--events", default=None,
+                    help="also write tick/trade/mode events as JSON lines to this file")
+parser.add_argument("--cold", action="store_true",
+                    help="skip warm start and wait for the usual warm-up ticks")
+parser.add_argument("--no-risk", action="store_true",
+                    help="trade without the pre-trade checks of risk.RiskEngine")
+parser.add_argument("--no-netting", action="store_true",
+                    help="send every order on its own instead of netting each tick's orders")
+parser.add_argument("--end", default=None,
+                    help="game end, epoch seconds or date-time (e.g. '2025-09-19 09:30:00')")
+parser.add_argument("--duration", type=float, default=None,
+                    help="game length in seconds from the first /priceHistory tick (instead of --end)")
+parser.add_argument("--close-before", type=float, default=60.0,
+                    help="seconds before the end to stop trading and rebalance to the target share")
+parser.add_argument("--snapshot", default="strategy_snapshot.json",
+                    help="strategy state file, written every few ticks and restored on start ('' = off)")
+parser.add_argument("--snapshot-age", type=float, default=300.0,
+                    help="ignore a snapshot older than this many seconds and warm start instead")
+args = parser.parse_args()
 
-strat = Strategy(show_log=True)
-strat.run()
\ No newline at end of file
+telemetry = Telemetry(args.events, echo=True)
+strat = Strategy(show_log=True, telemetry=telemetry, risk=None if args.no_risk else RiskEngine())
+if args.end or args.duration:
+    strat.session = Session.from_api(strat.api, duration=args.duration, end=args.end,
+                                     close_before=args.close_before)
+    print(f"Session: {strat.session.start} -> {strat.session.end}, close-out {args.close_before:.0f}s before")
+strat.coalesce = not args.no_netting
+strat.snapshot_path = args.snapshot or None
+if strat.snapshot_path and strat.load_snapshot(max_age=args.snapshot_age):
+    print(f"Resumed from {strat.snapshot_path}: mode {strat.mode}, {len(strat.stats.prices)} prices")
+elif not args.cold:
+    try:
+        print(f"Warm start from {strat.warm_start()} ticks of history")
+    except Exception as e:
+        print(f"Warm start failed ({e}), starting cold")
+try:
+    if args.use_async:
+        from async_runner import run_async
+        run_async(strat, period=args.period)
+    else:
+        strat.run(period=args.period)
+finally:
+    telemetry.close()
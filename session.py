@@ -0,0 +1,73 @@
+# session.py
+# Game schedule for a Strategy. Between start and end - close_before the strategy trades
+# as usual; from then on Strategy.will_close is set, so it stops opening positions and
+# moves the whole way to target_share in child orders (Strategy.rebalance), re-checking
+# every tick until the end.
+#
+# Times are epoch seconds on the server clock: the "time" of each /price response when
+# there is one, the local clock otherwise.
+#
+#   session = Session.from_api(api, duration=3600, close_before=30)
+#   strat.session = session            # Strategy.on_price() keeps it up to date
+
+import time
+from datetime import datetime
+
+PRE, OPEN, CLOSE_OUT, CLOSED = "pre", "open", "close_out", "closed"
+
+
+def parse_time(t):
+    # epoch seconds or an ISO date-time ("2025-09-19 09:07:45"); None if neither
+    if t is None:
+        return None
+    try:
+        return float(t)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(t)).timestamp()
+    except ValueError:
+        return None
+
+
+class Session:
+    def __init__(self, start=None, end=None, close_before=60.0, clock=time.time):
+        self.start = parse_time(start)
+        self.end = parse_time(end)
+        self.close_before = close_before
+        self.clock = clock
+        self.phase_now = None
+
+    @classmethod
+    def from_api(cls, api, duration=None, end=None, close_before=60.0):
+        # the game starts at the first tick of /priceHistory
+        times, _ = api.history_arrays()
+        start = float(times[0]) if len(times) else None
+        if end is None and duration is not None and start is not None:
+            end = start + duration
+        return cls(start, end, close_before)
+
+    def phase(self, now=None):
+        now = self.clock() if now is None else now
+        if self.start is not None and now < self.start:
+            return PRE
+        if self.end is None or now < self.end - self.close_before:
+            return OPEN
+        return CLOSE_OUT if now < self.end else CLOSED
+
+    def remaining(self, now=None):
+        if self.end is None:
+            return None
+        return self.end - (self.clock() if now is None else now)
+
+    def update(self, strategy, server_time=None):
+        # Phase at the latest tick; sets strategy.will_close from the close-out on
+        now = parse_time(server_time)
+        phase = self.phase(now)
+        if phase != self.phase_now:
+            strategy.telemetry.event('session', frm=self.phase_now, to=phase, remaining=self.remaining(now))
+            if strategy.show_log:
+                print(f"Session: {self.phase_now} -> {phase}")
+            self.phase_now = phase
+        strategy.will_close = phase in (CLOSE_OUT, CLOSED)
+        return phase
@@ -1,53 +1,143 @@
 
 from collections import deque
+import json
 import math
+import os
 import time
 from algo import API_MS
+from execution import Executor, OrderGateway
+from pricefeed import PriceFeed
+from telemetry import NullTelemetry, Telemetry
 import requests
 
 class Stats:
-    def __init__(self, price_len=120, vol_len=40, breakout_len=20):
+    # Every update and query is O(1), whatever the window lengths:
+    # mean/variance of returns use Welford running sums over a sliding window,
+    # high/low of the breakout window use monotonic deques.
+    def __init__(self, price_len=120, vol_len=40, breakout_len=20, ema_len=30):
         self.prices = deque(maxlen=price_len)
         self.returns = deque(maxlen=vol_len)       # log returns for volatility
-        self.window_breakout = deque(maxlen=breakout_len)
+        self.breakout_len = breakout_len
+        self.ema_len = ema_len
+        self.alpha = 2 / (ema_len + 1)             # EMA: alpha = 2/(N+1)
         self.ema = None
+        self._mean = 0.0                           # running mean of self.returns
+        self._m2 = 0.0                             # running sum of squared deviations
+        self._n = 0                                # ticks seen, indexes the deques below
+        self._maxq = deque()                       # (i, p), prices decreasing
+        self._minq = deque()                       # (i, p), prices increasing
+
+    def _push_return(self, r):
+        if len(self.returns) == self.returns.maxlen:
+            # drop the oldest sample from the running sums before the deque evicts it
+            old = self.returns[0]
+            n = len(self.returns)
+            if n == 1:
+                self._mean, self._m2 = 0.0, 0.0
+            else:
+                mean = (n * self._mean - old) / (n - 1)
+                self._m2 -= (old - self._mean) * (old - mean)
+                self._mean = mean
+        self.returns.append(r)
+        n = len(self.returns)
+        d = r - self._mean
+        self._mean += d / n
+        self._m2 = max(0.0, self._m2 + d * (r - self._mean))
 
     def update(self, p):
         if self.prices:
             last = self.prices[-1]
             r = math.log(p / last)
-            self.returns.append(r)
+            self._push_return(r)
         self.prices.append(p)
-        self.window_breakout.append(p)
-        # EMA (30s): alpha = 2/(N+1). N=30
-        alpha = 2 / (30 + 1)
-        self.ema = p if self.ema is None else (alpha * p + (1 - alpha) * self.ema)
+
+        i = self._n
+        self._n += 1
+        while self._maxq and self._maxq[-1][1] <= p:
+            self._maxq.pop()
+        self._maxq.append((i, p))
+        while self._minq and self._minq[-1][1] >= p:
+            self._minq.pop()
+        self._minq.append((i, p))
+        first = i - self.breakout_len + 1          # oldest index still in the window
+        if self._maxq[0][0] < first: self._maxq.popleft()
+        if self._minq[0][0] < first: self._minq.popleft()
+
+        self.ema = p if self.ema is None else (self.alpha * p + (1 - self.alpha) * self.ema)
+
+    def seed(self, prices):
+        # Same state as calling update() on each of `prices`, in one vectorized pass
+        import numpy as np
+        p = np.asarray(prices, dtype=float)
+        n = len(p)
+        self.prices.clear()
+        self.returns.clear()
+        self._maxq.clear()
+        self._minq.clear()
+        self._mean, self._m2, self._n, self.ema = 0.0, 0.0, n, None
+        if n == 0:
+            return
+        self.prices.extend(p[-self.prices.maxlen:].tolist())
+        tail = p[-(self.returns.maxlen + 1):]
+        r = np.log(tail[1:] / tail[:-1])
+        self.returns.extend(r.tolist())
+        if len(r):
+            self._mean = float(r.mean())
+            self._m2 = float(((r - self._mean) ** 2).sum())
+        # EMA as a weighted sum: p0 weighs (1-a)^(n-1), p_k weighs a(1-a)^(n-1-k)
+        w = self.alpha * (1 - self.alpha) ** np.arange(n - 1, -1, -1)
+        w[0] = (1 - self.alpha) ** (n - 1)
+        self.ema = float(w @ p)
+        start = max(0, n - self.breakout_len)
+        for i in range(start, n):
+            x = p[i]
+            while self._maxq and self._maxq[-1][1] <= x:
+                self._maxq.pop()
+            self._maxq.append((i, float(x)))
+            while self._minq and self._minq[-1][1] >= x:
+                self._minq.pop()
+            self._minq.append((i, float(x)))
 
     def vol(self):
         # standard deviation of returns over the last vol_len samples
         n = len(self.returns)
         if n < 2: return 0.0
-        mu = sum(self.returns) / n
-        var = sum((x - mu) ** 2 for x in self.returns) / (n - 1)
-        return math.sqrt(var)
+        return math.sqrt(self._m2 / (n - 1))
 
     def high20(self):
-        return max(self.window_breakout) if self.window_breakout else None
+        return self._maxq[0][1] if self._maxq else None
 
     def low20(self):
-        return min(self.window_breakout) if self.window_breakout else None
+        return self._minq[0][1] if self._minq else None
+
+    def state(self):
+        return {"windows": [self.prices.maxlen, self.returns.maxlen, self.breakout_len, self.ema_len],
+                "prices": list(self.prices), "returns": list(self.returns), "ema": self.ema,
+                "mean": self._mean, "m2": self._m2, "n": self._n,
+                "maxq": list(self._maxq), "minq": list(self._minq)}
+
+    def load_state(self, st):
+        if st["windows"] != [self.prices.maxlen, self.returns.maxlen, self.breakout_len, self.ema_len]:
+            raise ValueError(f"snapshot windows {st['windows']} differ from these Stats")
+        self.prices.clear(); self.prices.extend(st["prices"])
+        self.returns.clear(); self.returns.extend(st["returns"])
+        self.ema, self._mean, self._m2, self._n = st["ema"], st["mean"], st["m2"], st["n"]
+        self._maxq = deque(tuple(x) for x in st["maxq"])
+        self._minq = deque(tuple(x) for x in st["minq"])
 
 class CUSUM:
     # Simple drift detector: accumulates returns until a threshold is exceeded
-    def __init__(self, k=0.0, h=0.0):
+    def __init__(self, k=0.0, h=0.0, k_mult=0.2, h_mult=3.0):
         self.k = k  # small offset: ignore tiny noise
         self.h = h  # threshold to trigger
+        self.k_mult = k_mult  # k, h in units of return volatility
+        self.h_mult = h_mult
         self.pos = 0.0
         self.neg = 0.0
 
     def set_from_vol(self, sigma_r):
-        self.k = 0.2 * sigma_r
-        self.h = 3.0 * sigma_r
+        self.k = self.k_mult * sigma_r
+        self.h = self.h_mult * sigma_r
 
     def update(self, r):
         self.pos = max(0.0, self.pos + r - self.k)
@@ -59,12 +149,29 @@ class CUSUM:
         # return +1 for up-move, -1 for down-move, 0 for nothing
         return (1 if up else (-1 if down else 0))
 
+    def state(self):
+        return {"k": self.k, "h": self.h, "pos": self.pos, "neg": self.neg}
+
+    def load_state(self, st):
+        self.k, self.h, self.pos, self.neg = st["k"], st["h"], st["pos"], st["neg"]
+
 class Strategy:
-    def __init__(self,show_log=False):
+    def __init__(self,show_log=False, api=None, telemetry=None, detector=None, risk=None, pair=None):
         self.show_log = show_log
-        self.api = API_MS(self.show_log)
+        # per-tick logging goes through telemetry; show_log echoes it from a background thread
+        if telemetry is None:
+            telemetry = Telemetry(echo=True) if show_log else NullTelemetry()
+        self.telemetry = telemetry
+        self._t_stats = 0.0  # seconds spent in signals() this tick
+        self._t_trade = 0.0  # seconds spent in trade calls this tick
+        # any object with get_price/get_positions/trade works here (see backtest.PaperBroker)
+        self.api = api if api is not None else API_MS(self.show_log, pair=pair or "EURGBP")
+        # traded pair; the ledger below keeps the names eur/gbp for its base/quote amounts
+        self.pair = pair or getattr(self.api, 'pair', "EURGBP")
+        self.base, self.quote = self.pair[:3], self.pair[3:]
         self.stats = Stats()
-        self.cusum = CUSUM()
+        # regime detector: CUSUM by default, or any detectors.Detector
+        self.cusum = detector if detector is not None else CUSUM()
         self.mode = 'normal'  # or 'event_up', 'event_down'
         self.entry_price = None
         self.peak = None
@@ -73,135 +180,450 @@ class Strategy:
         self.max_normal = 300000
         self.max_event = 800000
         self.target_share = 0.40
+        self.z_entry = 2.5      # breakout: require a strong move
+        self.trail_pct = 0.007  # event trailing stop
+        self.z_band = 0.5       # mean reversion entry
+        self.z_exit = 0.2       # mean reversion flatten
         self.last_breakout_ts = 0
         self.will_close = False
+        self.close_tol = 0.001  # close-out done within this EUR share of target_share
+        self.warmup = 30  # returns needed before trading
+        # local EUR/GBP ledger, kept up to date from trade responses
+        self.eur = None
+        self.gbp = None
+        self.reconcile_every = 30  # ticks between GET /positions checks
+        self.drift_tol = 1.0       # units of EUR/GBP tolerated between ledger and server
+        self.drift_count = 0
+        self.last_drift = None
+        self._ticks_since_sync = 0
+        # when set, send() books orders optimistically and queues them in self.orders
+        # for a runner to execute (see async_runner.py); results come back via settle()
+        self.defer_orders = False
+        self.orders = []
+        # when set (and orders are not deferred), the orders of a tick are netted and sent
+        # together at the end of act() through an execution.OrderGateway around self.api
+        self.coalesce = False
+        self._gateway = None  # built on first use, sliced at trade_gbp_limit
+        self.executor = None  # built on first use around self.api, see send_sliced()
+        self.risk = risk      # risk.RiskEngine: pre-trade checks on every order, None = off
+        self.session = None   # session.Session: sets will_close on the game schedule
+        self.feed = None      # pricefeed.PriceFeed of the running loop
+        self.feature_stream = None  # features.FeatureStream, logged as 'features' events
+        # state snapshot for a fast restart (see snapshot()), written every snapshot_every ticks
+        self.snapshot_path = None
+        self.snapshot_every = 10
+        self._ticks_since_snapshot = 0
+        self._snapshot_mode = self.mode
+
+    def sync_due(self):
+        # whether the next portfolio() call will hit GET /positions
+        return self.eur is None or self._ticks_since_sync + 1 >= self.reconcile_every
+
+    def warm_start(self, prices=None):
+        # Seed Stats and CUSUM from history so the first live tick can trade.
+        # Default source: the local tick store, topped up from /priceHistory when reachable.
+        import numpy as np
+        from tickstore import TickStore
+        if prices is None:
+            store = TickStore(f"{self.pair}_ticks.bin")
+            try:
+                store.sync(self.api)
+            except Exception as e:
+                if self.show_log:
+                    print(f"Tick store sync failed, using {len(store)} stored ticks: {e}")
+            prices = store.prices()
+        self.stats.seed(prices)
+        if not isinstance(self.cusum, CUSUM):
+            self.cusum.reset()
+            for r in np.diff(np.log(np.asarray(prices, dtype=float))).tolist():
+                self.cusum.update(r)
+        else:
+            sigma_r = self.stats.vol()
+            self.cusum.pos = self.cusum.neg = 0.0
+            self.cusum.k = self.cusum.h = 0.0
+            if sigma_r > 0:
+                self.cusum.set_from_vol(sigma_r)
+                for r in self.stats.returns:  # bring the accumulators up to date
+                    self.cusum.update(r)
+        if self.feature_stream is not None:
+            self.feature_stream.seed_from(self)
+        return len(prices)
+
+    # What a restarted process needs to carry on where this one stopped: the mode and its
+    # reference prices, the Stats windows, the CUSUM accumulators and the ledger. Plain
+    # JSON, so restoring does not need NumPy and takes well under a millisecond.
+    SNAPSHOT_KEYS = ('mode', 'entry_price', 'peak', 'trough', 'last_breakout_ts', 'will_close',
+                     'eur', 'gbp')
+
+    def snapshot(self):
+        snap = {k: getattr(self, k) for k in self.SNAPSHOT_KEYS}
+        snap['ts'] = time.time()
+        snap['stats'] = self.stats.state()
+        # other detectors (detectors.py) hold NumPy state: restore() replays the stored
+        # prices into them instead
+        snap['cusum'] = self.cusum.state() if isinstance(self.cusum, CUSUM) else None
+        return snap
+
+    def restore(self, snap):
+        self.stats.load_state(snap['stats'])
+        if snap.get('cusum') is not None and isinstance(self.cusum, CUSUM):
+            self.cusum.load_state(snap['cusum'])
+        elif not isinstance(self.cusum, CUSUM):
+            # warm the detector up on the returns of the price window (price_len - 1 of them)
+            self.cusum.reset()
+            prices = list(self.stats.prices)
+            for a, b in zip(prices, prices[1:]):
+                self.cusum.update(math.log(b / a))
+        for k in self.SNAPSHOT_KEYS:
+            setattr(self, k, snap.get(k))
+        if self.feature_stream is not None:
+            self.feature_stream.seed_from(self)
+        # trades may have happened after the snapshot: check the ledger on the first tick
+        self._ticks_since_sync = self.reconcile_every
+
+    def save_snapshot(self, path=None):
+        # write-then-rename, so a crash mid-write leaves the previous snapshot intact
+        path = path or self.snapshot_path
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(self.snapshot(), fh, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def load_snapshot(self, path=None, max_age=None):
+        # Restore from `path`; False if it is missing, older than max_age seconds or unusable
+        path = path or self.snapshot_path
+        try:
+            with open(path, encoding='utf-8') as fh:
+                snap = json.load(fh)
+            if max_age is not None and time.time() - snap['ts'] > max_age:
+                return False
+            self.restore(snap)
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
 
     def portfolio(self, price):
-        inv = self.api.get_positions()  # {'EUR': eur, 'GBP': gbp}
-        if self.show_log:
-            print(f"Positions: {inv}")
-        eur, gbp = inv['EUR'], inv['GBP']
+        self._ticks_since_sync += 1
+        if self.eur is None or self._ticks_since_sync >= self.reconcile_every:
+            self.reconcile()
+        eur, gbp = self.eur, self.gbp
         V = gbp + price * eur
         share = 0.0 if V <= 0 else (price * eur) / V
         return eur, gbp, V, share
 
+    def reconcile(self, inv=None):
+        # Pull server positions into the ledger and flag any drift from what we booked
+        if inv is None:
+            inv = self.api.get_positions()  # {'EUR': eur, 'GBP': gbp, ...}
+        if self.show_log:
+            print(f"Positions: {inv}")
+        eur, gbp = float(inv[self.base]), float(inv[self.quote])
+        if self.eur is not None:
+            d_eur, d_gbp = eur - self.eur, gbp - self.gbp
+            if abs(d_eur) > self.drift_tol or abs(d_gbp) > self.drift_tol:
+                self.drift_count += 1
+                self.last_drift = (d_eur, d_gbp)
+                self.telemetry.count('drift')
+                self.telemetry.event('drift', eur=d_eur, gbp=d_gbp)
+                print(f"WARNING position drift: EUR {d_eur:+,.2f}, GBP {d_gbp:+,.2f}")
+        self.eur, self.gbp = eur, gbp
+        self._ticks_since_sync = 0
+
+    def pre_trade(self, qty, side, price, slice_gbp=None):
+        # Risk checks on an order: the quantity allowed to go out (0 = rejected)
+        qty, reason = self.risk.check(qty, side, price, self.eur, self.gbp, slice_gbp)
+        if reason:
+            tel = self.telemetry
+            tel.count(f'risk:{reason}')
+            if tel.enabled:
+                tel.event('risk', reason=reason, side=side, qty=qty, quote=price, mode=self.mode)
+        return qty
+
+    def send(self, qty, side, price=None):
+        # Trade and book the fill locally; a failed trade forces a reconcile next tick
+        if self.risk is not None:
+            qty = self.pre_trade(qty, side, price)
+            if not qty:
+                return None
+        if self.defer_orders or self.coalesce:
+            return self._defer(qty, side, price)
+        t0 = time.perf_counter()
+        resp = self.api.trade(qty, side=side)
+        dt = time.perf_counter() - t0
+        self._t_trade += dt
+        self._trade_event(qty, side, price, resp, dt)
+        if not resp:
+            self._ticks_since_sync = self.reconcile_every
+            return None
+        self.book_fill(qty, side, resp.get('price', price))
+        return resp
+
+    def _defer(self, qty, side, price):
+        self.book_fill(qty, side, price)
+        self.orders.append((qty, side, price))
+        self.telemetry.count('trade_queued')
+        return None
+
+    def _trade_event(self, qty, side, price, resp, dt):
+        tel = self.telemetry
+        if not tel.enabled:
+            return
+        tel.count('trade_ok' if resp else 'trade_failed')
+        tel.event('trade', qty=qty, side=side, quote=price, fill=resp.get('price') if resp else None,
+                  ok=bool(resp), mode=self.mode, us=dt * 1e6)
+
+    def send_sliced(self, qty, side, price):
+        # Orders above trade_gbp_limit go out as concurrent child orders in the same tick
+        ex = self.executor
+        if ex is None or ex.api is not self.api or ex.trade_gbp_limit != self.trade_gbp_limit:
+            if ex is not None:
+                ex.close()
+            ex = self.executor = Executor(self.api, self.trade_gbp_limit)
+        if self.risk is not None:
+            qty = self.pre_trade(qty, side, price, self.trade_gbp_limit)
+            if not qty:
+                return None
+        if self.coalesce:
+            return self._defer(qty, side, price)  # the gateway slices the net
+        if self.defer_orders:
+            for q in ex.slices(qty, price):
+                self._defer(q, side, price)
+            return None
+        t0 = time.perf_counter()
+        report = ex.execute(qty, side, price)
+        dt = time.perf_counter() - t0
+        self._t_trade += dt
+        if self.telemetry.enabled:
+            self.telemetry.count('trade_ok', len(report['fills']))
+            self.telemetry.count('trade_failed', len(report['failed']))
+            self.telemetry.event('sliced', qty=qty, side=side, quote=price, filled=report['filled'],
+                                 avg_price=report['avg_price'], children=len(report['fills']) + len(report['failed']),
+                                 failed=len(report['failed']), mode=self.mode, us=dt * 1e6)
+        for q, px in report['fills']:
+            self.book_fill(q, side, px)
+        if report['failed']:
+            self._ticks_since_sync = self.reconcile_every
+        return report
+
+    def settle(self, qty, side, price, resp):
+        # Outcome of a deferred order that send() booked at `price`
+        self._trade_event(qty, side, price, resp, 0.0)
+        if not resp:
+            self.book_fill(qty, 'sell' if side == 'buy' else 'buy', price)
+            self._ticks_since_sync = self.reconcile_every
+            return
+        px = resp.get('price')
+        if px is not None and price is not None and self.gbp is not None:
+            sign = 1 if side == 'buy' else -1
+            self.gbp -= sign * qty * (float(px) - price)
+
+    def flush_orders(self, price):
+        # Net this tick's queued orders into as few trades as possible, then settle each
+        orders, self.orders = self.orders, []
+        gw = self._gateway
+        if gw is None or gw.executor.api is not self.api or gw.executor.trade_gbp_limit != self.trade_gbp_limit:
+            if gw is not None:
+                gw.close()
+            gw = self._gateway = OrderGateway(self.api, self.trade_gbp_limit)
+        for qty, side, quote in orders:
+            gw.submit(qty, side, quote)
+        t0 = time.perf_counter()
+        fills = gw.flush(price)
+        self._t_trade += time.perf_counter() - t0
+        self.telemetry.count('trade_netted', len(orders))
+        for fill in fills:
+            self.settle_fill(*fill)
+
+    def settle_fill(self, qty, side, quote, filled, px):
+        # Outcome of a deferred order of qty booked at `quote` that was netted with others
+        # (execution.OrderGateway): `filled` of it at average price px
+        if filled <= 0:
+            self.settle(qty, side, quote, None)
+            return
+        if filled < qty:  # undo the unfilled part that send() booked optimistically
+            self.book_fill(qty - filled, 'sell' if side == 'buy' else 'buy', quote)
+        self.settle(filled, side, quote, {'price': px})
+
+    def book_fill(self, qty, side, px):
+        if self.eur is None or px is None:
+            self._ticks_since_sync = self.reconcile_every
+            return
+        px = float(px)
+        if side == 'buy':
+            self.eur += qty
+            self.gbp -= qty * px
+        else:
+            self.eur -= qty
+            self.gbp += qty * px
+
+    def rebalance(self, price, eur, gbp):
+        # Whole distance to target_share in one go; EUR bought is bounded by the GBP held
+        # and EUR sold by the EUR held, as before
+        V = gbp + price * eur
+        delta = self.target_share * V / price - eur
+        if V <= 0 or abs(delta) * price <= self.close_tol * V:
+            return None
+        if delta > 0:
+            qty, side = min(delta, max(0.0, gbp) / price), 'buy'
+        else:
+            qty, side = min(-delta, max(0.0, eur)), 'sell'
+        if qty <= 0:
+            return None
+        return self.send_sliced(qty, side, price)
+
     def max_eur_per_trade(self, price):
         return self.trade_gbp_limit / price
 
+    def on_price(self, price_data):
+        # One /price response: session schedule first, then the tick
+        if not price_data.get('price', None):
+            return
+        self.telemetry.event('price', **price_data)
+        if self.session is not None:
+            self.session.update(self, price_data.get('time'))
+        self.on_tick(float(price_data['price']))
+
     def on_tick(self, price):
+        t0 = time.perf_counter()
+        fs = self.feature_stream
+        if fs is not None:
+            vec = fs.update(price)
+            if self.telemetry.enabled and fs.ready:
+                self.telemetry.event('features', **dict(zip(fs.names, vec.tolist())))
+        sig = self.signals(price)
+        if sig is None:  # warm-up period
+            return
+        self._t_stats = time.perf_counter() - t0
+        self.act(price, *sig)
+        if self.snapshot_path:
+            self._ticks_since_snapshot += 1
+            # right away on a mode change, so an open event position survives a crash
+            if self._ticks_since_snapshot >= self.snapshot_every or self.mode != self._snapshot_mode:
+                self._ticks_since_snapshot = 0
+                self._snapshot_mode = self.mode
+                self.save_snapshot()
+
+    def signals(self, price):
         # 1) Update stats
         prev_price = self.stats.prices[-1] if self.stats.prices else None
         self.stats.update(price)
-        if len(self.stats.returns) < 30:  # warm-up period
-            return
+        if len(self.stats.returns) < self.warmup:
+            return None
 
         sigma_r = self.stats.vol()                  # volatility in return units
-        sigma_p = price * sigma_r                   # translate to price units
-        if self.cusum.h == 0.0:
+        if isinstance(self.cusum, CUSUM) and self.cusum.h == 0.0:
             self.cusum.set_from_vol(sigma_r)
         r = math.log(price / prev_price) if prev_price else 0.0
         cus = self.cusum.update(r)
+        return sigma_r, self.stats.ema, self.stats.high20(), self.stats.low20(), cus
 
-        ema = self.stats.ema
-        high20 = self.stats.high20()
-        low20 = self.stats.low20()
+    def act(self, price, sigma_r, ema, high20, low20, cus):
+        # signals come from self.signals() live, or precomputed in bulk by backtest.py
+        sigma_p = price * sigma_r                   # translate to price units
         z = 0.0 if sigma_p == 0 else (price - ema) / sigma_p  # "how far from average"
 
-    
+        t0 = time.perf_counter()
+        self._t_trade = 0.0
+        start_mode = self.mode
         eur, gbp, V, share = self.portfolio(price)
+        t_portfolio = time.perf_counter() - t0
         notional_eur = price * eur
+        if self.risk is not None:
+            self.risk.mark(V)
 
-        # 2) Detect calm vs moving
-        z_entry = 2.5  # require a strong move
-        breakout_up = ((price > high20) and (z > z_entry)) or (cus == 1)
-        breakout_dn = ((price < low20)  and (z < -z_entry)) or (cus == -1)
-
-        # 3) Switch modes if needed
-        if self.mode == 'normal':
-            if breakout_up:
-                self.mode = 'event_up'
-                self.entry_price = price
-                self.peak = price
-            elif breakout_dn:
-                self.mode = 'event_down'
-                self.entry_price = price
-                self.trough = price
+        if not self.will_close:
+            # 2) Detect calm vs moving
+            z_entry = self.z_entry
+            breakout_up = ((price > high20) and (z > z_entry)) or (cus == 1)
+            breakout_dn = ((price < low20)  and (z < -z_entry)) or (cus == -1)
 
-        if self.show_log:
-            print(f"Price: {price:.5f}, z: {z:.2f}, σ_p: {sigma_p:.5f}, mode: {self.mode}, "
-                  f"cus: {cus}, share: {share:.2%}, V: {V:,.0f} GBP")
-            print(f'Mode details: entry: {self.entry_price}, peak: {self.peak}, trough: {self.trough}')
-        # 4) Act based on mode
-        max_per_trade_eur = self.max_eur_per_trade(price)
-
-        if self.mode == 'event_up':
-            self.peak = max(self.peak, price)
-            trail_price = self.peak * (1 - 0.007)  # 0.7% trailing stop
-            # add only if continuing and under cap
-            cap = self.max_event
-            if price > self.entry_price and price >= high20 and notional_eur < cap:
-                size = min(max_per_trade_eur, (cap - notional_eur) / price)
-                if size > 0:
-                    self.api.trade(size, side='buy')
-            # exit on trailing stop
-            if price < trail_price:
-                self.mode = 'normal'
-
-        elif self.mode == 'event_down':
-            self.trough = min(self.trough, price)
-            trail_price = self.trough * (1 + 0.007)
-            cap = self.max_event
-            if price < self.entry_price and price <= low20 and notional_eur > -cap:
-                size = min(max_per_trade_eur, (cap + price * (-eur)) / price)
-                if size > 0:
-                    self.api.trade(size, side='sell')
-            if price > trail_price:
-                self.mode = 'normal'
-
-        if self.mode == 'normal':
-        # Mean reversion with aggressive entries (free fees)
-            if sigma_r > 0:
-                if z < -0.5 and notional_eur < self.max_normal:
-                    # Go long aggressively
-                    size = min(max_per_trade_eur, (self.max_normal - notional_eur) / price)
+            # 3) Switch modes if needed
+            if self.mode == 'normal':
+                if breakout_up:
+                    self.mode = 'event_up'
+                    self.entry_price = price
+                    self.peak = price
+                elif breakout_dn:
+                    self.mode = 'event_down'
+                    self.entry_price = price
+                    self.trough = price
+
+            # 4) Act based on mode
+            max_per_trade_eur = self.max_eur_per_trade(price)
+
+            if self.mode == 'event_up':
+                self.peak = max(self.peak, price)
+                trail_price = self.peak * (1 - self.trail_pct)  # trailing stop
+                # add only if continuing and under cap, straight to the cap in child orders
+                cap = self.max_event
+                if price > self.entry_price and price >= high20 and notional_eur < cap:
+                    size = (cap - notional_eur) / price
                     if size > 0:
-                        self.api.trade(size, side='buy')   # full size, no half
-                elif z > 0.5 and notional_eur > -self.max_normal:
-                    # Go short aggressively
-                    size = min(max_per_trade_eur, (self.max_normal + price * (-eur)) / price)
+                        self.send_sliced(size, 'buy', price)
+                # exit on trailing stop
+                if price < trail_price:
+                    self.mode = 'normal'
+
+            elif self.mode == 'event_down':
+                self.trough = min(self.trough, price)
+                trail_price = self.trough * (1 + self.trail_pct)
+                cap = self.max_event
+                if price < self.entry_price and price <= low20 and notional_eur > -cap:
+                    size = (cap + notional_eur) / price
                     if size > 0:
-                        self.api.trade(size, side='sell')
+                        self.send_sliced(size, 'sell', price)
+                if price > trail_price:
+                    self.mode = 'normal'
+
+            if self.mode == 'normal':
+            # Mean reversion with aggressive entries (free fees)
+                if sigma_r > 0:
+                    if z < -self.z_band and notional_eur < self.max_normal:
+                        # Go long aggressively
+                        size = min(max_per_trade_eur, (self.max_normal - notional_eur) / price)
+                        if size > 0:
+                            self.send(size, 'buy', price)   # full size, no half
+                    elif z > self.z_band and notional_eur > -self.max_normal:
+                        # Go short aggressively
+                        size = min(max_per_trade_eur, (self.max_normal + price * (-eur)) / price)
+                        if size > 0:
+                            self.send(size, 'sell', price)
                 
-                # Exit quickly when z reverts
-                if abs(z) < 0.2 and abs(notional_eur) > 0:
-                    # flatten position to capture profits
-                    if notional_eur > 0:
-                        self.api.trade(notional_eur / price, side='sell')
-                    else:
-                        self.api.trade(-notional_eur / price, side='buy')
-
-
-        # 5) End-of-exercise rebalance to ~40% EUR
-        if self.will_close :
-            target_share = self.target_share
-            V = gbp + price * eur
-            target_eur = (target_share * V) / price
-            delta_eur = target_eur - eur
-            step = max(-max_per_trade_eur, min(max_per_trade_eur, delta_eur))
-            if abs(step) > 1e-6:
-                if step > 0 and gbp >= step * price:
-                    self.api.trade(step, side='buy')
-                elif step < 0 and eur >= -step:
-                    self.api.trade(-step, side='sell')
-
-    def run(self):
+                    # Exit quickly when z reverts
+                    if abs(z) < self.z_exit and abs(notional_eur) > 0:
+                        # flatten position to capture profits
+                        if notional_eur > 0:
+                            self.send_sliced(notional_eur / price, 'sell', price)
+                        else:
+                            self.send_sliced(-notional_eur / price, 'buy', price)
+
+        else:
+            # 5) End-of-exercise close-out (session.Session sets will_close on schedule):
+            # no new positions, straight to target_share in child orders
+            self.mode = 'normal'
+            self.rebalance(price, eur, gbp)
+
+        if self.coalesce and not self.defer_orders and self.orders:
+            self.flush_orders(price)
+
+        # 6) One event per tick with the timing spans; serialised off the hot path
+        tel = self.telemetry
+        if tel.enabled:
+            total = time.perf_counter() - t0
+            if self.mode != start_mode:
+                tel.count(f'mode:{start_mode}->{self.mode}')
+                tel.event('mode', frm=start_mode, to=self.mode, price=price)
+            tel.event('tick', price=price, z=z, sigma_p=sigma_p, mode=self.mode, cus=cus,
+                      share=share, V=gbp + price * eur, entry=self.entry_price, peak=self.peak,
+                      trough=self.trough, stats_us=self._t_stats * 1e6,
+                      portfolio_us=t_portfolio * 1e6, trade_us=self._t_trade * 1e6,
+                      decide_us=(total - t_portfolio - self._t_trade) * 1e6)
+
+    def run(self, period=1.0, max_ticks=None, feed=None):
+        # Every server tick once (pricefeed.PriceFeed); max_ticks counts ticks, not polls
         print("Starting strategy...")
-        while True:
-            price_data = self.api.get_price()
-            if price_data :
-                if price_data.get('price', None):
-                    if self.show_log:
-                        print(f"Price data: {price_data}")
-                    price = float(price_data['price'])
-                    self.on_tick(price)
-            time.sleep(1)  # wait before next tick
+        if feed is None:
+            feed = PriceFeed(self.api, period=period, telemetry=self.telemetry)
+        self.feed = feed
+        for price_data in feed.ticks(max_ticks):
+            self.on_price(price_data)
@@ -0,0 +1,106 @@
+# sweep.py
+# Grid search over Strategy thresholds: every combination is an offline replay
+# (backtest.run_backtest) and combinations are spread over all cores.
+#
+#   python sweep.py                        # default grid below
+#   python sweep.py --grid grid.json       # {"z_entry": [2, 2.5, 3], "max_event": [400000, 800000]}
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from backtest import PaperBroker, load_prices, run_backtest, strategy_features
+from strag import Strategy, Stats
+
+DEFAULT_GRID = {
+    "z_entry": [2.0, 2.5, 3.0],
+    "trail_pct": [0.004, 0.007, 0.01],
+    "z_band": [0.3, 0.5, 0.8],
+    "z_exit": [0.1, 0.2],
+    "k_mult": [0.2, 0.5],
+    "h_mult": [3.0, 5.0],
+    "ema_len": [20, 30, 60],
+    "max_normal": [200000, 300000],
+    "max_event": [800000],
+}
+
+# Which object each parameter lives on; everything else is a Strategy attribute
+CUSUM_PARAMS = ("k_mult", "h_mult")
+STATS_PARAMS = ("ema_len", "vol_len", "breakout_len")
+
+
+def make_strategy(params):
+    strat = Strategy(api=PaperBroker())  # run_backtest gives it a fresh book
+    st = strat.stats
+    sizes = {"vol_len": st.returns.maxlen, "breakout_len": st.breakout_len, "ema_len": st.ema_len}
+    sizes.update({k: v for k, v in params.items() if k in STATS_PARAMS})
+    strat.stats = Stats(price_len=st.prices.maxlen, **sizes)
+    for name, value in params.items():
+        if name in CUSUM_PARAMS:
+            setattr(strat.cusum, name, value)
+        elif name not in STATS_PARAMS:
+            if not hasattr(strat, name):
+                raise ValueError(f"Unknown strategy parameter: {name}")
+            setattr(strat, name, value)
+    return strat
+
+
+def expand(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+# per-process state, filled by _init_worker
+_prices = None
+_feats = {}
+
+
+def _init_worker(path):
+    global _prices
+    _prices = load_prices(path)
+
+
+def _run_one(params):
+    strat = make_strategy(params)
+    st = strat.stats
+    key = (st.ema_len, st.returns.maxlen, st.breakout_len)
+    if key not in _feats:  # the bulk pass only depends on the window lengths
+        _feats[key] = strategy_features(strat, _prices)
+    res = run_backtest(_prices, strat, feats=_feats[key])
+    return dict(params, **{k: res[k] for k in
+                           ("pnl", "max_drawdown", "trades", "share_violations", "normalized_capital")})
+
+
+def sweep(grid, path="EURGBP_price_history.csv", workers=None):
+    combos = expand(grid)
+    workers = workers or os.cpu_count()
+    chunk = max(1, len(combos) // (workers * 8))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(path,)) as pool:
+        rows = list(pool.map(_run_one, combos, chunksize=chunk))
+    return (pd.DataFrame(rows)
+            .sort_values(["pnl", "max_drawdown"], ascending=[False, True])
+            .reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grid", help="JSON file mapping parameter name -> list of values")
+    parser.add_argument("--prices", default="EURGBP_price_history.csv")
+    parser.add_argument("--out", default="sweep_results.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as fh:
+            grid = json.load(fh)
+    t0 = time.perf_counter()
+    table = sweep(grid, args.prices, args.workers)
+    table.to_csv(args.out, index=False)
+    print(f"{len(table)} combinations in {time.perf_counter() - t0:.1f}s -> {args.out}")
+    print(table.head(10).to_string())
@@ -0,0 +1,97 @@
+# telemetry.py
+# Low-overhead instrumentation for the trading loop.
+# The hot path only does a queue put per event and dict increments for counters;
+# a background thread serialises events to a JSON-lines file and, if echo is set,
+# prints them (this replaces the per-tick print() calls in Strategy).
+#
+#   tel = Telemetry("strategy_events.jsonl", echo=True)
+#   strat = Strategy(telemetry=tel)
+#   ...
+#   tel.close()
+#
+# Event line: {"ts": <epoch s>, "kind": "tick" | "trade" | "mode" | "drift" | ..., ...fields}
+
+import json
+import queue
+import threading
+import time
+from collections import Counter
+
+_STOP = object()
+
+
+class NullTelemetry:
+    # Default sink: instrumentation disabled, every call is a no-op
+    enabled = False
+
+    def __init__(self):
+        self.counters = Counter()
+
+    def event(self, kind, **fields):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+class Telemetry(NullTelemetry):
+    enabled = True
+
+    def __init__(self, path=None, echo=False, flush_every=1.0):
+        super().__init__()
+        self.path = path
+        self.echo = echo
+        self.flush_every = flush_every
+        self._q = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def event(self, kind, **fields):
+        self._q.put((time.time(), kind, fields))
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def _write_loop(self):
+        fh = open(self.path, "a", encoding="utf-8") if self.path else None
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    item = self._q.get(timeout=self.flush_every)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    return
+                if item is not None:
+                    ts, kind, fields = item
+                    if fh is not None:
+                        fh.write(json.dumps(dict(fields, ts=ts, kind=kind), default=str) + "\n")
+                    if self.echo:
+                        print(format_event(kind, fields))
+                if fh is not None and time.monotonic() - last_flush >= self.flush_every:
+                    fh.flush()
+                    last_flush = time.monotonic()
+        finally:
+            if fh is not None:
+                fh.write(json.dumps({"ts": time.time(), "kind": "counters",
+                                     **self.counters}) + "\n")
+                fh.close()
+
+    def close(self):
+        self._q.put(_STOP)
+        self._thread.join()
+
+
+def format_event(kind, f):
+    # Console form of an event, same wording as the old Strategy prints
+    if kind == "tick":
+        return (f"Price: {f['price']:.5f}, z: {f['z']:.2f}, σ_p: {f['sigma_p']:.5f}, mode: {f['mode']}, "
+                f"cus: {f['cus']}, share: {f['share']:.2%}, V: {f['V']:,.0f} GBP "
+                f"[stats {f['stats_us']:.0f}us, portfolio {f['portfolio_us']:.0f}us, "
+                f"decide {f['decide_us']:.0f}us, trade {f['trade_us']:.0f}us]\n"
+                f"Mode details: entry: {f['entry']}, peak: {f['peak']}, trough: {f['trough']}")
+    return f"{kind}: " + ", ".join(f"{k}={v}" for k, v in f.items())
@@ -0,0 +1,84 @@
+# tickstore.py
+# Append-only tick file: fixed-width little-endian records (time: epoch seconds f8, price: f8).
+# Reads are memory-mapped, so loading a session is a view, not a parse.
+#
+#   store = TickStore()
+#   store.sync(API_MS())          # append only the ticks we don't have yet
+#   prices = store.prices()       # zero-copy NumPy view
+
+import os
+import numpy as np
+
+TICK_DTYPE = np.dtype([("time", "<f8"), ("price", "<f8")])
+TICKS_FILE = "EURGBP_ticks.bin"
+
+
+class TickStore:
+    def __init__(self, path=TICKS_FILE):
+        self.path = path
+        self._repair()
+
+    def _repair(self):
+        # a crash mid-write can leave a partial record at the end: drop it
+        if os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            if size % TICK_DTYPE.itemsize:
+                with open(self.path, "r+b") as fh:
+                    fh.truncate(size - size % TICK_DTYPE.itemsize)
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // TICK_DTYPE.itemsize
+
+    def view(self):
+        n = len(self)
+        if n == 0:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.memmap(self.path, dtype=TICK_DTYPE, mode="r", shape=(n,))
+
+    def times(self):
+        return self.view()["time"]
+
+    def prices(self):
+        return self.view()["price"]
+
+    def last_time(self):
+        n = len(self)
+        if n == 0:
+            return None
+        with open(self.path, "rb") as fh:
+            fh.seek((n - 1) * TICK_DTYPE.itemsize)
+            return float(np.frombuffer(fh.read(TICK_DTYPE.itemsize), dtype=TICK_DTYPE)["time"][0])
+
+    def append(self, times, prices):
+        # Only ticks strictly newer than the last stored one are written; returns how many
+        times = np.asarray(times, dtype="<f8")
+        prices = np.asarray(prices, dtype="<f8")
+        order = np.argsort(times, kind="stable")
+        times, prices = times[order], prices[order]
+        keep = np.r_[True, np.diff(times) > 0] if len(times) else np.ones(0, dtype=bool)
+        last = self.last_time()
+        if last is not None:
+            keep &= times > last
+        times, prices = times[keep], prices[keep]
+        if len(times) == 0:
+            return 0
+        rec = np.empty(len(times), dtype=TICK_DTYPE)
+        rec["time"] = times
+        rec["price"] = prices
+        with open(self.path, "ab") as fh:
+            fh.write(rec.tobytes())
+        return len(rec)
+
+    def sync(self, api):
+        # /priceHistory returns the whole session; only the tail past our last tick is written
+        times, prices = api.history_arrays()
+        return self.append(times, prices)
+
+    def import_csv(self, path="EURGBP_price_history.csv"):
+        # one-off migration of the old time,price CSV (times in UTC)
+        import pandas as pd
+        df = pd.read_csv(path, parse_dates=["time"])
+        times = (df["time"] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+        return self.append(times.to_numpy(dtype=float), df["price"].to_numpy(dtype=float))
@@ -1,10 +1,12 @@
 # python -m pip install requests
 
 import json
-import requests
+import os
+from http_client import get_client
 
-URL = "http://fx-trading-game-ensimag-challenge.westeurope.azurecontainer.io/:443"
+URL = os.environ.get("FX_URL", "http://fx-trading-game-ensimag-challenge.westeurope.azurecontainer.io/:443")
 TRADER_ID = "your_trader_id_here"
+PAIR = os.environ.get("FX_PAIR", "EURGBP")
 
 
 class Side:
@@ -12,18 +14,16 @@ class Side:
     SELL = "sell"
 
 
-def get_price():
-    api_url = URL + "/price/EURGBP"
-    res = requests.get(api_url)
+def get_price(pair=PAIR):
+    res = get_client(URL).get(f"/price/{pair}")
     if res.status_code == 200:
         return json.loads(res.content.decode('utf-8'))["price"]
     return None
 
 
-def trade(trader_id, qty, side):
-    api_url = URL + "/trade/EURGBP"
+def trade(trader_id, qty, side, pair=PAIR):
     data = {"trader_id": trader_id, "quantity": qty, "side": side}
-    res = requests.post(api_url, json=data)
+    res = get_client(URL).post(f"/trade/{pair}", json=data)
     if res.status_code == 200:
         resp_json = json.loads(res.content.decode('utf-8'))
         if resp_json["success"]: